@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,11 @@ INSTALLED_APPS = [
 ]
 
 REST_FRAMEWORK = {
+    # Basic first so anonymous writes get 401 with a WWW-Authenticate challenge
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.BasicAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -94,6 +100,37 @@ DATABASES = {
     }
 }
 
+# Set DATABASE_URL (needs dj-database-url) to run on PostgreSQL instead,
+# e.g. to check the book indexes with `manage.py check_book_indexes`
+if os.environ.get('DATABASE_URL'):
+    import dj_database_url
+    DATABASES['default'] = dj_database_url.parse(os.environ['DATABASE_URL'])
+
+
+# Logging
+# Set QUERY_SHAPE_LOG to a file path to record the filter/ordering shape of
+# every book list request, for `manage.py analyze_query_shapes`
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'query_shapes': {
+            'class': 'logging.FileHandler',
+            'filename': os.environ['QUERY_SHAPE_LOG'],
+        } if os.environ.get('QUERY_SHAPE_LOG') else {
+            'class': 'logging.NullHandler',
+        },
+    },
+    'loggers': {
+        'api.query_shapes': {
+            'handlers': ['query_shapes'],
+            'level': 'INFO' if os.environ.get('QUERY_SHAPE_LOG') else 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,106 @@
+"""
+Compact list mode: serialize list pages from ``.values_list()`` rows.
+
+A ModelSerializer builds a model instance per row and then dispatches
+``get_attribute()``/``to_representation()`` on every field of it. For
+plain columns that work is an identity: ``IntegerField.to_representation``
+is ``int(value)`` on an int, ``CharField``'s is ``str(value)`` on a str and
+``PrimaryKeyRelatedField``'s returns the foreign key's value. compile_plan()
+checks a serializer once for fields of exactly those kinds and turns it into
+a plan: the output keys plus the columns to fetch. A page is then one
+``values_list()`` query zipped into dicts, which render to byte-for-byte the
+same JSON as the serializer's output.
+
+Serializers the plan cannot prove identical for (other field types, dotted
+sources, method fields, overridden ``to_representation``) get no plan and
+the view falls back to the serializer.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+
+# Serializer fields whose to_representation() is an identity on the values
+# the database returns for these model fields
+PASSTHROUGH_FIELDS = {
+    serializers.IntegerField: {
+        'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField',
+        'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField',
+        'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+    },
+    serializers.CharField: {'CharField', 'TextField', 'SlugField', 'EmailField', 'URLField'},
+    serializers.BooleanField: {'BooleanField'},
+}
+
+_plans = {}
+
+
+class FieldPlan:
+    """Output keys and the ``values_list()`` columns that fill them."""
+
+    def __init__(self, keys, columns):
+        self.keys = keys
+        self.columns = columns
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def represent(self, rows):
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in rows]
+
+
+def _column(field, model):
+    if field.write_only or len(field.source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if model_field.get_internal_type() in PASSTHROUGH_FIELDS.get(type(field), ()):
+        return model_field.attname
+    if (type(field) is relations.PrimaryKeyRelatedField and field.pk_field is None
+            and model_field.many_to_one and model_field.target_field.primary_key):
+        return model_field.attname
+    return None
+
+
+def compile_plan(serializer_class):
+    """The FieldPlan for ``serializer_class``, or None if it has none."""
+    if serializer_class not in _plans:
+        _plans[serializer_class] = _compile(serializer_class)
+    return _plans[serializer_class]
+
+
+def _compile(serializer_class):
+    if not issubclass(serializer_class, serializers.ModelSerializer):
+        return None
+    if serializer_class.to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer_class.Meta.model
+    keys, columns = [], []
+    for field in serializer_class()._readable_fields:
+        column = _column(field, model)
+        if column is None:
+            return None
+        keys.append(field.field_name)
+        columns.append(column)
+    return FieldPlan(tuple(keys), tuple(columns))
+
+
+class CompactListMixin:
+    """
+    Serve ``list()`` through the serializer's FieldPlan when it has one.
+    Filtering, ordering and pagination work as before.
+    """
+    compact_list = True
+
+    def list(self, request, *args, **kwargs):
+        plan = compile_plan(self.get_serializer_class()) if self.compact_list else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = plan.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.represent(page))
+        return Response(plan.represent(rows))
@@ -0,0 +1,104 @@
+"""
+Conditional GET for DRF list and detail views.
+
+ConditionalGetMixin answers ``If-None-Match`` with a 304 before the page is
+loaded or serialized. The validator is one aggregate query over the view's
+filtered queryset, by default the row count and the newest ``updated_at``;
+for a detail view the queryset is narrowed to the one object. The ETag
+hashes those values with the URL (query string included, so every filter,
+search and ordering has its own), the viewer and the negotiated media type.
+
+Row count plus newest ``updated_at`` catches creates, deletes and edits,
+as long as rows are not changed with ``QuerySet.update()``, which skips
+``auto_now``. Views whose representation depends on more than the listed
+rows add aggregates in get_validator_aggregates() or values in
+get_validators().
+
+Last-Modified is only sent for detail views whose validators are the
+default ones: a list's newest ``updated_at`` does not move when a row is
+deleted, so it cannot answer ``If-Modified-Since`` safely.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    updated_field = 'updated_at'
+
+    def get_validator_aggregates(self):
+        return {
+            'count': Count('pk'),
+            'updated': Max(self.updated_field),
+        }
+
+    def get_validators(self, queryset):
+        """Values that change whenever the response would."""
+        return queryset.aggregate(**self.get_validator_aggregates())
+
+    def _sends_last_modified(self):
+        return (
+            type(self).get_validator_aggregates is ConditionalGetMixin.get_validator_aggregates
+            and type(self).get_validators is ConditionalGetMixin.get_validators
+        )
+
+    def _etag(self, validators):
+        user = self.request.user
+        parts = [
+            type(self).__name__,
+            self.request.get_full_path(),
+            str(user.pk) if user.is_authenticated else 'anon',
+            getattr(self.request, 'accepted_media_type', '') or '',
+        ] + [f'{key}={value!r}' for key, value in sorted(validators.items())]
+        digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+        return quote_etag(digest)
+
+    def _conditional(self, queryset, respond, detail=False):
+        validators = self.get_validators(queryset)
+        if detail and not validators['count']:
+            # Let the view raise its usual 404
+            return respond()
+        etag = self._etag(validators)
+        last_modified = validators.get('updated') if detail and self._sends_last_modified() else None
+
+        if_none_match = self.request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            matched = etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+        elif last_modified is not None:
+            since = parse_http_date_safe(self.request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            matched = since is not None and int(last_modified.timestamp()) <= since
+        else:
+            matched = False
+
+        response = Response(status=status.HTTP_304_NOT_MODIFIED) if matched else respond()
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self._conditional(queryset, lambda: super(ConditionalGetMixin, self).list(
+            request, *args, **kwargs
+        ))
+
+    def retrieve(self, request, *args, **kwargs):
+        def respond():
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Not a valid value for the lookup field: the view's 404
+            return respond()
+        return self._conditional(queryset, respond, detail=True)
@@ -0,0 +1,52 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Book
+from api.query_shapes import read_log, suggest_indexes, supported_shapes
+from api.views import BookListCreateView
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the book list query shapes in QUERY_SHAPE_LOG files and suggest "
+        "the composite indexes that serve them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("logs", nargs="*", help="Log files written by QueryShapeMixin.")
+        parser.add_argument("--all", action="store_true",
+                            help="Use every supported shape instead of a log.")
+
+    def handle(self, *args, **options):
+        view = BookListCreateView
+        if options["all"]:
+            shapes = Counter(supported_shapes(view))
+        elif options["logs"]:
+            shapes = Counter()
+            for path in options["logs"]:
+                with open(path, encoding="utf-8") as lines:
+                    shapes.update(shape for name, shape in read_log(lines) if name == view.__name__)
+        else:
+            raise CommandError("Give log files or --all")
+
+        self.stdout.write(f"{'requests':>9}  shape")
+        for shape, count in shapes.most_common():
+            search = "  +search" if shape.search else ""
+            self.stdout.write(
+                f"{count:>9}  filters={','.join(shape.filters) or '-'} "
+                f"ordering={','.join(shape.ordering) or '-'}{search}"
+            )
+
+        existing = {tuple(index.fields) for index in Book._meta.indexes}
+        self.stdout.write("\nBook.Meta.indexes:")
+        missing = 0
+        for columns in suggest_indexes(shapes, view):
+            missing += columns not in existing
+            name = "book_" + "_".join(column.replace("publication_", "") for column in columns) + "_idx"
+            self.stdout.write(
+                f"    models.Index(fields={list(columns)!r}, name={name!r}),"
+                + ("" if columns in existing else "  # missing")
+            )
+        if missing:
+            self.stdout.write(f"{missing} missing; add them and run makemigrations")
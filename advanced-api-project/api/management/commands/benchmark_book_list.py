@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.compact import compile_plan
+from api.models import Author, Book
+from api.serializers import BookSerializer
+
+
+def seed_books(rows):
+    """Top the books table up to ``rows`` rows; returns how many were added."""
+    missing = rows - Book.objects.count()
+    if missing <= 0:
+        return 0
+    authors = list(Author.objects.all()[:100]) or Author.objects.bulk_create(
+        Author(name=f"Benchmark author {i}") for i in range(100)
+    )
+    Book.objects.bulk_create(
+        (Book(title=f"Benchmark book {i}", publication_year=1900 + i % 125,
+              author=authors[i % len(authors)]) for i in range(missing)),
+        batch_size=2000,
+    )
+    return missing
+
+
+class Command(BaseCommand):
+    help = (
+        "Time listing books through BookSerializer against the compact "
+        "values_list() plan, e.g. `benchmark_book_list --rows 100000`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000,
+                            help="Seed the books table up to this many rows.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        seeded = seed_books(options["rows"])
+        if seeded:
+            self.stdout.write(f"Seeded {seeded} books")
+        queryset = Book.objects.order_by("title")[:options["rows"]]
+        plan = compile_plan(BookSerializer)
+        renderer = JSONRenderer()
+
+        paths = {
+            "serializer": lambda: BookSerializer(queryset.all(), many=True).data,
+            "compact": lambda: plan.represent(plan.rows(queryset.all())),
+        }
+        outputs = {}
+        self.stdout.write(f"{'path':<12}{'rows':>8}{'fetch+serialize':>18}{'render':>10}{'rows/s':>12}")
+        for name, serialize in paths.items():
+            build, render = [], []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                data = serialize()
+                built = time.perf_counter()
+                outputs[name] = renderer.render(data)
+                render.append(time.perf_counter() - built)
+                build.append(built - started)
+            total = statistics.median(build) + statistics.median(render)
+            self.stdout.write(
+                f"{name:<12}{len(data):>8}{statistics.median(build) * 1000:>16.1f}ms"
+                f"{statistics.median(render) * 1000:>8.1f}ms{len(data) / total:>12.0f}"
+            )
+        if outputs["serializer"] != outputs["compact"]:
+            raise CommandError("The two paths rendered different JSON")
+        self.stdout.write("Both paths rendered identical JSON")
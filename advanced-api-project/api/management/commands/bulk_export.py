@@ -0,0 +1,38 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import bulk
+
+
+class Command(BaseCommand):
+    help = "Export authors or books as NDJSON or CSV to a file ('-' for stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(bulk.DATASETS))
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=bulk.FORMATS,
+            help="Defaults to csv for .csv files, ndjson otherwise.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+        target = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        started = time.perf_counter()
+        rows = -1 if file_format == "csv" else 0  # not counting the CSV header
+        try:
+            for line in bulk.DATASETS[options["dataset"]]().export_lines(file_format):
+                target.write(line)
+                rows += 1
+        finally:
+            if target is not sys.stdout:
+                target.close()
+
+        seconds = time.perf_counter() - started
+        self.stderr.write(
+            f"Exported {rows} {options['dataset']} in {seconds:.2f}s "
+            f"({rows / seconds if seconds else 0:.0f} rows/s)"
+        )
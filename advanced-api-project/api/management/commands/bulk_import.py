@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api import bulk
+
+
+class Command(BaseCommand):
+    help = "Import authors or books from an NDJSON or CSV file ('-' for stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(bulk.DATASETS))
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=bulk.FORMATS,
+            help="Defaults to csv for .csv files, ndjson otherwise.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+        source = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            result = bulk.DATASETS[options["dataset"]]().import_rows(
+                bulk.read_rows(bulk.decode_lines(source), file_format),
+                batch_size=options["batch_size"],
+            )
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"... and {result.failed - len(result.errors)} more")
+        self.stdout.write(
+            f"Imported {result.created} {options['dataset']}, {result.failed} failed, "
+            f"in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s)"
+        )
@@ -0,0 +1,88 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from api.models import Book
+from api.query_shapes import supported_shapes
+from api.views import BookListCreateView
+
+from .benchmark_book_list import seed_books
+
+
+def uses_index(plan, vendor):
+    """Whether a query plan reads api_book through an index without sorting."""
+    if vendor == "postgresql":
+        return "Seq Scan" not in plan and "Sort" not in plan
+    for line in plan.splitlines():
+        if "SCAN api_book" in line and "USING" not in line:
+            return False
+        if "TEMP B-TREE" in line:
+            return False
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that every filter/ordering combination of the book list reads "
+        "through an index without a sort, and time each one (SQLite or PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000,
+                            help="Seed the books table up to this many rows.")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        seed_books(options["rows"])
+        vendor = connection.vendor
+        if vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"No plan check for {vendor}")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        sample = Book.objects.order_by("pk").values("title", "author", "publication_year").first()
+        factory = APIRequestFactory()
+
+        failures = []
+        self.stdout.write(f"{'filters':<34}{'ordering':<19}{'rows':>6}{'ms':>9}  plan")
+        for shape in supported_shapes(BookListCreateView):
+            params = {field: sample[field] for field in shape.filters}
+            params["ordering"] = ",".join(shape.ordering)
+            view = BookListCreateView()
+            view.setup(factory.get("/", params))
+            view.request = view.initialize_request(view.request)
+            view.format_kwarg = None
+            queryset = view.filter_queryset(view.get_queryset())
+
+            plan = self.explain(queryset, vendor)
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                rows = len(list(queryset.values_list("pk")))
+                timings.append(time.perf_counter() - started)
+            ok = uses_index(plan, vendor)
+            if not ok:
+                failures.append(shape)
+            self.stdout.write(
+                f"{','.join(shape.filters) or '-':<34}{shape.ordering[0]:<19}{rows:>6}"
+                f"{statistics.median(timings) * 1000:>9.2f}  "
+                f"{'ok' if ok else 'NO INDEX'}: {' | '.join(plan.split(chr(10)))[:90]}"
+            )
+        if failures:
+            raise CommandError(f"{len(failures)} shapes without an index: {failures}")
+        self.stdout.write(f"All shapes use an index on {vendor}")
+
+    def explain(self, queryset, vendor):
+        if vendor == "sqlite":
+            return queryset.explain()
+        # Tables small enough to fit a page make sequential scans and sorts
+        # cheapest; rule those out to see whether an index can serve the shape
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off; SET enable_sort = off")
+        try:
+            return queryset.explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("RESET enable_seqscan; RESET enable_sort")
@@ -13,12 +13,23 @@ class Author(models.Model):
 class Book(models.Model):
     title = models.CharField(max_length=255)
     publication_year = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)  # ETag/Last-Modified, see api/conditional.py
     author = models.ForeignKey(
         Author,
         related_name='books',   # allows nested serialization: author.books
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        # One per group of filter/ordering combinations on the book list,
+        # from `manage.py analyze_query_shapes --all` (see api/query_shapes.py)
+        indexes = [
+            models.Index(fields=['author', 'publication_year', 'title'], name='book_author_year_title_idx'),
+            models.Index(fields=['author', 'title', 'publication_year'], name='book_author_title_year_idx'),
+            models.Index(fields=['publication_year', 'title'], name='book_year_title_idx'),
+            models.Index(fields=['title', 'publication_year'], name='book_title_year_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.publication_year})"
 
@@ -0,0 +1,127 @@
+"""
+Query shapes of the list endpoints: which filters and ordering a request
+used, independent of the values. QueryShapeMixin logs one JSON line per
+list request to the "api.query_shapes" logger (see LOGGING in settings.py),
+and the analyze_query_shapes command turns a log of them into composite
+indexes with suggest_indexes().
+
+An index serves a shape when it starts with the shape's equality filters,
+in any order, followed by the ordering column: the database seeks to the
+filtered rows and reads them already sorted, forwards or backwards. Search
+is ``icontains`` and cannot use a B-tree index, so it is logged but plays
+no part in index choice.
+"""
+import itertools
+import json
+import logging
+
+from rest_framework.filters import OrderingFilter
+
+logger = logging.getLogger(__name__)
+
+
+class Shape:
+    def __init__(self, filters, ordering, search=False):
+        self.filters = tuple(sorted(filters))
+        self.ordering = tuple(ordering)
+        self.search = search
+
+    def key(self):
+        return self.filters, self.ordering, self.search
+
+    def __eq__(self, other):
+        return isinstance(other, Shape) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f'Shape(filters={self.filters}, ordering={self.ordering}, search={self.search})'
+
+    def as_dict(self):
+        return {'filters': list(self.filters), 'ordering': list(self.ordering),
+                'search': self.search}
+
+    def query_params(self):
+        """Query parameters that produce this shape (values are placeholders)."""
+        params = {field: '1' for field in self.filters}
+        if self.ordering:
+            params['ordering'] = ','.join(self.ordering)
+        if self.search:
+            params['search'] = 'a'
+        return params
+
+
+def shape_of(request, view):
+    params = request.query_params
+    filters = [field for field in getattr(view, 'filterset_fields', ())
+               if params.get(field) not in (None, '')]
+    ordering = OrderingFilter().get_ordering(request, view.get_queryset(), view) or ()
+    return Shape(filters, ordering, search=bool(params.get('search')))
+
+
+def supported_shapes(view_class):
+    """Every combination of equality filters with every ordering, both directions."""
+    fields = list(view_class.filterset_fields)
+    orderings = [(field,) for field in view_class.ordering_fields]
+    orderings += [('-' + field,) for field in view_class.ordering_fields]
+    for size in range(len(fields) + 1):
+        for filters in itertools.combinations(fields, size):
+            for ordering in orderings:
+                yield Shape(filters, ordering)
+
+
+def index_columns(shape, column_order):
+    """The columns of the index serving ``shape``."""
+    columns = sorted(shape.filters, key=column_order.index)
+    for field in shape.ordering:
+        field = field.lstrip('-')
+        if field not in columns:
+            columns.append(field)
+    return tuple(columns)
+
+
+def column_order(view_class):
+    """
+    Filter-only fields first, then the sortable ones: an index ending in a
+    sortable column can serve ordering by it as well.
+    """
+    sortable = list(view_class.ordering_fields)
+    return [field for field in view_class.filterset_fields if field not in sortable] + sortable
+
+
+def suggest_indexes(shapes, view_class):
+    """
+    Composite indexes covering ``shapes`` of ``view_class``, leaving out any
+    index that is a prefix of another (the longer one serves its shapes too).
+    """
+    order = column_order(view_class)
+    wanted = {index_columns(shape, order) for shape in shapes}
+    wanted.discard(())
+    return sorted(
+        columns for columns in wanted
+        if not any(other != columns and other[:len(columns)] == columns for other in wanted)
+    )
+
+
+class QueryShapeMixin:
+    """Log the shape of every list request."""
+
+    def list(self, request, *args, **kwargs):
+        if logger.isEnabledFor(logging.INFO):
+            shape = shape_of(request, self)
+            logger.info(json.dumps({'view': type(self).__name__, **shape.as_dict()}))
+        return super().list(request, *args, **kwargs)
+
+
+def read_log(lines):
+    """Shapes from log lines written by QueryShapeMixin, skipping anything else."""
+    for line in lines:
+        start = line.find('{')
+        if start == -1:
+            continue
+        try:
+            entry = json.loads(line[start:])
+            yield entry['view'], Shape(entry['filters'], entry['ordering'], entry['search'])
+        except (ValueError, KeyError, TypeError):
+            continue
@@ -1,46 +1,29 @@
 from rest_framework import serializers
-from datetime import datetime
 from .models import Author, Book
 
 
 # BookSerializer handles individual book objects.
-# It includes custom validation for publication_year.
+# The author is accepted and returned as an id.
 class BookSerializer(serializers.ModelSerializer):
-
-    def validate_publication_year(self, value):
-        current_year = datetime.now().year
-        if value > current_year:
-            raise serializers.ValidationError("Publication year cannot be in the future.")
-        return value
+    author = serializers.PrimaryKeyRelatedField(queryset=Author.objects.all())  # Accept ID
 
     class Meta:
         model = Book
-        fields = ['id', 'title', 'publication_year', 'author']
+        fields = ['id', 'title', 'author', 'publication_year']  # include all required fields
 
 
 # AuthorSerializer serializes author data AND includes nested books.
+# "books" refers to related_name='books' in the Book model; the views
+# prefetch it (and may limit it), book_count is annotated by the views.
 class AuthorSerializer(serializers.ModelSerializer):
-    # "books" refers to related_name='books' in the Book model
     books = BookSerializer(many=True, read_only=True)
+    book_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Author
-        fields = ['id', 'name', 'books']
-
-
-# api/serializers.py
-from rest_framework import serializers
-from .models import Book, Author
-
-class AuthorSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Author
-        fields = ['id', 'name']
-
-class BookSerializer(serializers.ModelSerializer):
-    author = serializers.PrimaryKeyRelatedField(queryset=Author.objects.all())  # Accept ID
+        fields = ['id', 'name', 'book_count', 'books']
 
-    class Meta:
-        model = Book
-        fields = ['id', 'title', 'author', 'publication_year']  # include all required fields
 
+# Same, with book ids in place of the nested books.
+class AuthorBookIdsSerializer(AuthorSerializer):
+    books = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
@@ -1,3 +1,357 @@
+import csv
+import io
+import json
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework import serializers, status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import bulk
+from .compact import compile_plan
+from .query_shapes import Shape, read_log, suggest_indexes, supported_shapes
+from .models import Author, Book
+from .serializers import BookSerializer
+from .views import BookDetailView, BookListCreateView
+
+
+def ndjson(rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+
+class BulkImportTests(TestCase):
+
+    def setUp(self):
+        self.authors = [Author.objects.create(name=f'Author {i}') for i in range(3)]
+
+    def import_books(self, text, file_format='ndjson', batch_size=1000):
+        rows = bulk.read_rows(io.StringIO(text), file_format)
+        return bulk.BookDataset().import_rows(rows, batch_size=batch_size)
+
+    def test_ndjson_skips_and_reports_bad_rows(self):
+        text = ndjson([
+            {'title': 'Good', 'publication_year': 2001, 'author': self.authors[0].pk},
+            {'title': '', 'publication_year': 2001, 'author': self.authors[0].pk},
+            {'title': 'No author', 'publication_year': 2001, 'author': 9999},
+            {'title': 'Bad year', 'publication_year': 'soon', 'author': self.authors[1].pk},
+        ]) + 'not json\n'
+        result = self.import_books(text)
+        self.assertEqual((result.created, result.failed), (1, 4))
+        self.assertEqual(
+            [error['line'] for error in result.errors], [2, 3, 4, 5]
+        )
+        self.assertEqual(result.errors[1]['error'], 'author 9999 does not exist')
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ['Good'])
+
+    def test_csv(self):
+        text = 'title,publication_year,author\nFirst,1999,{0}\nSecond,,{0}\n'.format(
+            self.authors[2].pk
+        )
+        result = self.import_books(text, 'csv')
+        self.assertEqual((result.created, result.failed), (1, 1))
+        self.assertEqual(result.errors[0], {'line': 3, 'error': 'publication_year is required'})
+
+    def test_one_author_query_per_chunk(self):
+        text = ndjson(
+            {'title': f'Book {i}', 'publication_year': 2000, 'author': self.authors[i % 3].pk}
+            for i in range(50)
+        )
+        # Per chunk: the author lookup, then SAVEPOINT, INSERT, RELEASE
+        with self.assertNumQueries(2 * 4):
+            result = self.import_books(text, batch_size=25)
+        self.assertEqual(result.created, 50)
+
+    def test_existing_ids_are_rejected(self):
+        result = bulk.AuthorDataset().import_rows(bulk.read_rows(io.StringIO(ndjson([
+            {'id': self.authors[0].pk, 'name': 'Clash'},
+            {'id': 500, 'name': 'Kept id'},
+        ])), 'ndjson'))
+        self.assertEqual((result.created, result.failed), (1, 1))
+        self.assertEqual(Author.objects.get(pk=500).name, 'Kept id')
+        # The sequence moved past the imported id
+        self.assertGreater(Author.objects.create(name='Next').pk, 500)
+
+    def test_duplicate_and_non_positive_ids_are_rejected(self):
+        result = bulk.AuthorDataset().import_rows(bulk.read_rows(io.StringIO(ndjson([
+            {'id': 600, 'name': 'First'},
+            {'id': 600, 'name': 'Repeat'},
+            {'id': -3, 'name': 'Negative'},
+            {'id': 0, 'name': 'Zero'},
+        ])), 'ndjson'))
+        self.assertEqual((result.created, result.failed), (1, 3))
+        self.assertEqual([error['line'] for error in result.errors], [2, 3, 4])
+        self.assertEqual(result.errors[0]['error'], 'id 600 appears more than once')
+        self.assertEqual(Author.objects.get(pk=600).name, 'First')
+
+    def test_future_publication_year_is_rejected(self):
+        result = self.import_books(ndjson([
+            {'title': 'Later', 'publication_year': 99999, 'author': self.authors[0].pk},
+        ]))
+        self.assertEqual(result.errors, [
+            {'line': 1, 'error': 'Publication year cannot be in the future.'},
+        ])
+        self.assertFalse(Book.objects.exists())
+
+    def test_out_of_range_and_non_integer_values_are_rejected(self):
+        author = self.authors[0].pk
+        lines = [
+            json.dumps({'id': 2**70, 'title': 'Huge id', 'publication_year': 2000, 'author': author}),
+            json.dumps({'title': 'Huge author', 'publication_year': 2000, 'author': 2**70}),
+            json.dumps({'title': 'Tiny year', 'publication_year': -10**30, 'author': author}),
+            '{"title": "Overflowing float", "publication_year": 1e400, "author": %d}' % author,
+            json.dumps({'title': 'Float', 'publication_year': 1999.9, 'author': author}),
+            json.dumps({'title': 'Bool', 'publication_year': 2000, 'author': True}),
+            json.dumps({'title': 'Fine', 'publication_year': '2000', 'author': str(author)}),
+        ]
+        result = self.import_books('\n'.join(lines) + '\n')
+        self.assertEqual((result.created, result.failed), (1, 6))
+        self.assertEqual(result.errors[4]['error'], 'publication_year must be an integer')
+        self.assertIn('must be between', result.errors[0]['error'])
+
+    def test_undecodable_lines_are_reported(self):
+        body = [
+            ndjson([{'title': 'Good', 'publication_year': 2001, 'author': self.authors[0].pk}]).encode(),
+            b'{"title": "\xff\xfe"}\n',
+        ]
+        result = bulk.BookDataset().import_rows(bulk.read_rows(bulk.decode_lines(body), 'ndjson'))
+        self.assertEqual((result.created, result.errors), (1, [
+            {'line': 2, 'error': 'line is not valid UTF-8'},
+        ]))
+
+        body = [b'title,publication_year,author\n', b'\xff,2001,1\n', b'Never read,2001,1\n']
+        result = bulk.BookDataset().import_rows(bulk.read_rows(bulk.decode_lines(body), 'csv'))
+        self.assertEqual((result.created, result.failed), (0, 1))
+        self.assertEqual(result.errors[0]['line'], 2)
+
+    def test_export_round_trips_through_commands(self):
+        for i in range(5):
+            Book.objects.create(title=f'Book, "{i}"', publication_year=1990 + i,
+                                author=self.authors[i % 3])
+        expected = list(Book.objects.order_by('pk').values_list(
+            'title', 'publication_year', 'author_id'
+        ))
+        quiet = {'stdout': io.StringIO(), 'stderr': io.StringIO()}
+        for suffix in ('.csv', '.ndjson'):
+            with tempfile.NamedTemporaryFile(suffix=suffix) as target:
+                call_command('bulk_export', 'books', target.name, **quiet)
+                Book.objects.all().delete()
+                call_command('bulk_import', 'books', target.name, **quiet)
+            self.assertEqual(list(Book.objects.order_by('pk').values_list(
+                'title', 'publication_year', 'author_id'
+            )), expected)
+
+
+class BulkEndpointTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='loader', password='password123')
+        self.author = Author.objects.create(name='Author')
+        self.client = APIClient()
+
+    def test_import_requires_authentication(self):
+        response = self.client.post(reverse('book-bulk-import'), '', content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_import_and_export(self):
+        self.client.force_authenticate(self.user)
+        body = ndjson([
+            {'title': 'Streamed', 'publication_year': 2010, 'author': self.author.pk},
+            {'title': 'Orphan', 'publication_year': 2010, 'author': 0},
+        ])
+        response = self.client.post(
+            reverse('book-bulk-import'), body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+
+        response = self.client.post(
+            reverse('author-bulk-import'), 'name\nFrom CSV\n', content_type='text/csv'
+        )
+        self.assertEqual(response.data['created'], 1)
+
+        response = self.client.get(reverse('book-export'), {'type': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['title'] for row in rows], ['Streamed'])
+
+        response = self.client.get(reverse('author-export'))
+        names = [json.loads(line)['name'] for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(names, ['Author', 'From CSV'])
+
+    def test_import_reports_non_utf8_bodies(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('author-bulk-import'), b'{"name": "\xe9"}\n', content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['errors'], [{'line': 1, 'error': 'line is not valid UTF-8'}])
+
+    def test_export_rejects_unknown_type(self):
+        response = self.client.get(reverse('book-export'), {'type': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompactListTests(TestCase):
+
+    def setUp(self):
+        authors = [Author.objects.create(name=name) for name in ('Ann', 'Bob')]
+        for i in range(6):
+            Book.objects.create(title=f'Title "{i}" \u00e9', publication_year=2000 + i % 3,
+                                author=authors[i % 2])
+        self.url = reverse('book-list')
+
+    def get_both(self, params):
+        compact = self.client.get(self.url, params)
+        BookListCreateView.compact_list = False
+        try:
+            full = self.client.get(self.url, params)
+        finally:
+            BookListCreateView.compact_list = True
+        return compact, full
+
+    def test_same_bytes_as_the_serializer(self):
+        for params in ({}, {'ordering': '-publication_year'}, {'publication_year': 2001},
+                       {'search': 'Ann'}):
+            compact, full = self.get_both(params)
+            self.assertEqual(compact.status_code, 200)
+            self.assertEqual(compact.content, full.content, params)
+
+    def test_one_query_per_page(self):
+        # ETag validators, then the page
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_only_provably_identical_serializers_get_a_plan(self):
+        self.assertEqual(compile_plan(BookSerializer).columns,
+                         ('id', 'title', 'author_id', 'publication_year'))
+
+        class Nested(serializers.ModelSerializer):
+            author_name = serializers.CharField(source='author.name')
+
+            class Meta:
+                model = Book
+                fields = ['id', 'author_name']
+
+        class Computed(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Book
+                fields = ['id', 'label']
+
+            def get_label(self, book):
+                return str(book)
+
+        class YearAsText(serializers.ModelSerializer):
+            publication_year = serializers.CharField()
+
+            class Meta:
+                model = Book
+                fields = ['publication_year']
+
+        for serializer_class in (Nested, Computed, YearAsText):
+            self.assertIsNone(compile_plan(serializer_class), serializer_class.__name__)
+
+
+class QueryShapeTests(TestCase):
+
+    def test_list_requests_log_their_shape(self):
+        with self.assertLogs('api.query_shapes', 'INFO') as logs:
+            self.client.get(reverse('book-list'), {'publication_year': 2001, 'author': 1,
+                                                   'ordering': '-publication_year'})
+            self.client.get(reverse('book-list'), {'search': 'x', 'ordering': 'bogus'})
+        shapes = [shape for _, shape in read_log(logs.output)]
+        self.assertEqual(shapes, [
+            Shape(['author', 'publication_year'], ['-publication_year']),
+            Shape([], ['title'], search=True),
+        ])
+
+    def test_model_has_the_suggested_indexes(self):
+        suggested = suggest_indexes(supported_shapes(BookListCreateView), BookListCreateView)
+        self.assertEqual(sorted(tuple(index.fields) for index in Book._meta.indexes), suggested)
+
+    def test_every_shape_uses_an_index(self):
+        call_command('check_book_indexes', rows=500, repeat=1, stdout=io.StringIO())
+
+
+class AuthorBooksTests(TestCase):
+
+    def setUp(self):
+        self.authors = [Author.objects.create(name=f'Author {i}') for i in range(5)]
+        for author in self.authors:
+            for year in (2001, 2003, 2002):
+                Book.objects.create(title=f'{author.name} {year}', publication_year=year,
+                                    author=author)
+
+    def test_query_count_does_not_grow_with_authors(self):
+        # Authors with their book counts, then every author's books
+        for params in ({}, {'books_limit': 2}, {'books': 'ids'}):
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('author-list'), params)
+            self.assertEqual(len(response.data), 5)
+        Author.objects.create(name='Author without books')
+        with self.assertNumQueries(2):
+            self.client.get(reverse('author-list'))
+
+    def test_top_books_per_author(self):
+        response = self.client.get(reverse('author-list'), {'books_limit': 2})
+        first = response.data[0]
+        self.assertEqual(first['book_count'], 3)
+        self.assertEqual([book['publication_year'] for book in first['books']], [2003, 2002])
+        self.assertEqual(set(first['books'][0]), {'id', 'title', 'author', 'publication_year'})
+
+    def test_book_ids(self):
+        author = self.authors[1]
+        response = self.client.get(reverse('author-detail', args=[author.pk]),
+                                   {'books': 'ids', 'books_limit': 1})
+        latest = Book.objects.get(author=author, publication_year=2003)
+        self.assertEqual(response.data['books'], [latest.pk])
+
+    def test_invalid_limit(self):
+        for limit in ('0', 'many', '1000'):
+            response = self.client.get(reverse('author-list'), {'books_limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name='Author')
+        self.book = Book.objects.create(title='Cached', publication_year=2000, author=self.author)
+        self.other = Book.objects.create(title='Other', publication_year=2001, author=self.author)
+        self.detail = reverse('book-detail', args=[self.book.pk])
+
+    def test_lists_and_details_get_304_before_serializing(self):
+        for url, params in ((reverse('book-list'), {}),
+                            (reverse('book-list'), {'publication_year': 2000}),
+                            (self.detail, {})):
+            etag = self.client.get(url, params)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_edits_and_deletes_change_the_etag(self):
+        url = reverse('book-list')
+        etag = self.client.get(url)['ETag']
+        self.book.title = 'Edited'
+        self.book.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        self.other.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_details_send_last_modified(self):
+        last_modified = self.client.get(self.detail)['Last-Modified']
+        response = self.client.get(self.detail, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Last-Modified', self.client.get(reverse('book-list')))
 
-# Create your tests here.
+    def test_invalid_ids_are_not_found(self):
+        # The URLconf only routes integers; the view must not 500 on anything else
+        request = APIRequestFactory().get('/api/books/abc/', HTTP_IF_NONE_MATCH='"stale"')
+        response = BookDetailView.as_view()(request, pk='abc')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,20 +1,16 @@
 from django.urls import path
 from .views import (
-    BookListView,
-    BookDetailView,
-    BookCreateView,
-    BookUpdateView,
-    BookDeleteView
+    AuthorDetailView, AuthorListView, BookDetailView, BookListCreateView, BulkExportView,
+    BulkImportView,
 )
 
 urlpatterns = [
-    path('books/', BookListView.as_view(), name='book-list'),
+    path('books/', BookListCreateView.as_view(), name='book-list'),
     path('books/<int:pk>/', BookDetailView.as_view(), name='book-detail'),
-
-    # POST same as list
-    path('books/', BookCreateView.as_view()),
-
-    # PUT & DELETE same as detail
-    path('books/<int:pk>/', BookUpdateView.as_view()),
-    path('books/<int:pk>/', BookDeleteView.as_view()),
+    path('books/bulk/', BulkImportView.as_view(dataset='books'), name='book-bulk-import'),
+    path('books/export/', BulkExportView.as_view(dataset='books'), name='book-export'),
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    path('authors/<int:pk>/', AuthorDetailView.as_view(), name='author-detail'),
+    path('authors/bulk/', BulkImportView.as_view(dataset='authors'), name='author-bulk-import'),
+    path('authors/export/', BulkExportView.as_view(dataset='authors'), name='author-export'),
 ]
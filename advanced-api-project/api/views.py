@@ -1,15 +1,28 @@
-from rest_framework import generics, filters
+from django.http import StreamingHttpResponse
+from rest_framework import generics, filters, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as django_filters_rest_framework
-from .models import Book
-from .serializers import BookSerializer
-from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count, F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from .models import Author, Book
+from .serializers import AuthorBookIdsSerializer, AuthorSerializer, BookSerializer
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from . import bulk
+from .compact import CompactListMixin
+from .conditional import ConditionalGetMixin
+from .query_shapes import QueryShapeMixin
 
 
-class BookListCreateView(generics.ListCreateAPIView):
+# Lists are served from .values_list() rows (see api/compact.py); the JSON is
+# the same as BookSerializer's
+class BookListCreateView(QueryShapeMixin, ConditionalGetMixin, CompactListMixin,
+                         generics.ListCreateAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticatedOrReadOnly]
 
     # Add filtering, searching, ordering
     filter_backends = [
@@ -22,9 +35,110 @@ class BookListCreateView(generics.ListCreateAPIView):
     filterset_fields = ['title', 'author', 'publication_year']
 
     # Search
-    search_fields = ['title', 'author']
+    search_fields = ['title', 'author__name']
 
     # Order results
     ordering_fields = ['title', 'publication_year']
     ordering = ['title']  # default ordering
 
+
+
+class BookDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+# Authors with their books
+# ---------------------------------------------------------
+# Every author's books come from one prefetch query, however many authors
+# are listed. ?books_limit=N keeps each author's N latest books, ranked
+# with a window function inside that same query; ?books=ids returns book
+# ids instead of nested books.
+AUTHOR_BOOK_ORDER = ['-publication_year', 'title', 'id']
+MAX_BOOKS_LIMIT = 100
+
+
+def author_books_prefetch(limit=None, ids_only=False):
+    books = Book.objects.order_by(*AUTHOR_BOOK_ORDER)
+    if ids_only:
+        books = books.only('id', 'author')
+    if limit is not None:
+        books = books.annotate(
+            rank=Window(RowNumber(), partition_by=F('author'), order_by=AUTHOR_BOOK_ORDER)
+        ).filter(rank__lte=limit)
+    return Prefetch('books', queryset=books)
+
+
+class AuthorBooksMixin:
+    queryset = Author.objects.all()
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def books_limit(self):
+        value = self.request.query_params.get('books_limit')
+        if value in (None, ''):
+            return None
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_BOOKS_LIMIT:
+            raise ValidationError({'books_limit': f'Must be between 1 and {MAX_BOOKS_LIMIT}.'})
+        return limit
+
+    def ids_only(self):
+        return self.request.query_params.get('books') == 'ids'
+
+    def get_queryset(self):
+        return (
+            super().get_queryset()
+            .annotate(book_count=Count('books'))
+            .prefetch_related(author_books_prefetch(self.books_limit(), self.ids_only()))
+            .order_by('name', 'id')
+        )
+
+    def get_serializer_class(self):
+        return AuthorBookIdsSerializer if self.ids_only() else AuthorSerializer
+
+
+class AuthorListView(AuthorBooksMixin, generics.ListAPIView):
+    pass
+
+
+class AuthorDetailView(AuthorBooksMixin, generics.RetrieveAPIView):
+    pass
+
+
+class BulkImportView(APIView):
+    """
+    POST newline-delimited JSON (application/x-ndjson) or CSV (text/csv)
+    to create rows in bulk. The body is streamed a chunk at a time, never
+    parsed as a whole, so uploads of any size run in bounded memory.
+    """
+    permission_classes = [IsAuthenticated]
+    dataset = None
+
+    def post(self, request):
+        file_format = 'csv' if 'csv' in request.content_type else 'ndjson'
+        # The raw request, line by line: request.data would read it all
+        lines = bulk.decode_lines(iter(request._request))
+        result = bulk.DATASETS[self.dataset]().import_rows(bulk.read_rows(lines, file_format))
+        code = status.HTTP_201_CREATED if result.created else status.HTTP_200_OK
+        return Response(result.as_dict(), status=code)
+
+
+class BulkExportView(APIView):
+    """Stream every row as ?type=ndjson (the default) or ?type=csv."""
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    dataset = None
+
+    def get(self, request):
+        file_format = request.query_params.get('type', 'ndjson')
+        if file_format not in bulk.FORMATS:
+            raise ValidationError({'type': f'Choose one of {", ".join(bulk.FORMATS)}.'})
+        response = StreamingHttpResponse(
+            bulk.DATASETS[self.dataset]().export_lines(file_format),
+            content_type=bulk.CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.dataset}.{file_format}"'
+        return response
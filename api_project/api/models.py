@@ -3,6 +3,7 @@ from django.db import models
 class Book(models.Model):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)  # ETag/Last-Modified, see api/conditional.py
 
     def __str__(self):
         return self.title
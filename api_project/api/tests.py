@@ -1,3 +1,42 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import Book
+
+
+class ConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='password123')
+        self.client.force_authenticate(self.user)
+        self.book = Book.objects.create(title='Cached', author='Someone')
+        self.urls = [
+            reverse('book-list'),
+            reverse('book_all-list'),
+            reverse('book_all-detail', args=[self.book.pk]),
+        ]
+
+    def test_current_etag_gets_304_before_serializing(self):
+        for url in self.urls:
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+
+    def test_changes_get_a_new_copy(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        self.client.patch(self.urls[2], {'title': 'Edited'})
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get(self.urls[0])['ETag']
+        self.client.force_authenticate(User.objects.create_user(username='other'))
+        self.assertNotEqual(self.client.get(self.urls[0])['ETag'], etag)
+
+    def test_invalid_ids_are_not_found(self):
+        response = self.client.get('/api/books_all/abc/', HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
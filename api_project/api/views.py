@@ -1,37 +1,40 @@
 from rest_framework import generics
 from .models import Book
 from .serializers import BookSerializer
+from .conditional import ConditionalGetMixin
 
-class BookList(generics.ListAPIView):
+class BookList(ConditionalGetMixin, generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
 
 from rest_framework import viewsets
 from .models import Book
 from .serializers import BookSerializer
+from .conditional import ConditionalGetMixin
 from rest_framework import generics
 
 # Keep your existing BookList view
-class BookList(generics.ListAPIView):
+class BookList(ConditionalGetMixin, generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
 
 # New ViewSet for full CRUD
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from .models import Book
 from .serializers import BookSerializer
+from .conditional import ConditionalGetMixin
 from rest_framework import generics
 
-class BookList(generics.ListAPIView):
+class BookList(ConditionalGetMixin, generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]  # Require login
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]  # Require token
@@ -0,0 +1,157 @@
+"""
+Response caching for the read-only blog pages.
+
+Each cached page declares what it depends on: "list" (every post list page),
+"post:<pk>" (one post, its comments and tags), "tag:<slug>" (one tag page)
+and "tags" (the tag cloud). Every dependency has a version number in the cache. Page keys and
+ETags are built from the versions of their dependencies, so bumping a
+version (see blog/signals.py) makes exactly the pages that depend on it
+miss. Nothing has to be deleted or enumerated.
+
+Pages are keyed by view, object, query string and viewer: anonymous visitors
+share one copy and signed-in users each get their own, since pages show
+author-only links. The same versions give ETags, so a client holding a
+current page gets a 304 without the view running at all.
+
+Works with any cache backend; see CACHES in settings.py for the local
+memory and file-based setups. Pages rendering a CSRF token must not be
+cached this way.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+VERSION_PREFIX = 'blog:version:'
+PAGE_PREFIX = 'blog:page:'
+
+
+def _version_key(dependency):
+    return VERSION_PREFIX + dependency
+
+
+def versions(dependencies):
+    """Current version of each dependency, creating missing ones."""
+    keys = [_version_key(dependency) for dependency in dependencies]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # A time-based start means a version evicted from the cache never
+            # comes back with a value an old page was stored under
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(*dependencies):
+    """Invalidate every page depending on any of ``dependencies``."""
+    for dependency in set(dependencies):
+        key = _version_key(dependency)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def post_dependency(pk):
+    return f'post:{pk}'
+
+
+def tag_dependency(slug):
+    return f'tag:{slug}'
+
+
+def _viewer(request):
+    user = request.user
+    return f'user{user.pk}' if user.is_authenticated else 'anon'
+
+
+def cached_page(request, name, dependencies, render):
+    """
+    Serve ``render()``'s response for ``request`` from the cache.
+
+    ``name`` identifies the view and ``dependencies`` the data it shows.
+    Only successful GET/HEAD responses are stored.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return render()
+
+    parts = [name, request.get_full_path(), _viewer(request)] + [
+        str(version) for version in versions(dependencies)
+    ]
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    etag = quote_etag(digest)
+
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        key = PAGE_PREFIX + digest
+        stored = cache.get(key)
+        if stored is not None:
+            content, content_type = stored
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = render()
+            if response.status_code != 200:
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            timeout = getattr(settings, 'BLOG_CACHE_TIMEOUT', 600)
+            cache.set(key, (response.content, response['Content-Type']), timeout)
+
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def fragment_context(dependencies):
+    """
+    Template context for ``{% cache cache_timeout name fragment_version %}``
+    blocks showing data from ``dependencies``. Unlike whole pages, fragments
+    can be shared between anonymous and signed-in viewers.
+    """
+    return {
+        'fragment_version': '-'.join(str(version) for version in versions(dependencies)),
+        'cache_timeout': getattr(settings, 'BLOG_CACHE_TIMEOUT', 600),
+    }
+
+
+class CachedPageMixin:
+    """
+    Cache a class-based view's GET responses.
+
+    Views set ``cache_name`` and implement ``get_cache_dependencies()``,
+    which may only use the URL kwargs (the object has not been loaded yet).
+    """
+    cache_name = None
+
+    def get_cache_dependencies(self):
+        return ['list']
+
+    def dispatch(self, request, *args, **kwargs):
+        return cached_page(
+            request, self.cache_name, self.get_cache_dependencies(),
+            lambda: super(CachedPageMixin, self).dispatch(request, *args, **kwargs),
+        )
+
+
+def cache_page_on(dependencies):
+    """
+    Decorator version of CachedPageMixin for function views.
+
+    ``dependencies(**kwargs)`` receives the URL kwargs.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return cached_page(
+                request, view.__name__, dependencies(**kwargs),
+                lambda: view(request, *args, **kwargs),
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,53 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.models import Post
+from blog.tags import sync_tags
+
+
+class Command(BaseCommand):
+    help = (
+        "Import posts from a JSON-lines file, one "
+        '{"title", "content", "author", "tags"} object per line.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        imported = 0
+        with open(options["path"], encoding="utf-8") as lines:
+            batch = []
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except ValueError as exc:
+                    raise CommandError(f"line {number}: {exc}")
+                if len(batch) >= options["batch_size"]:
+                    imported += self.import_batch(batch)
+                    batch = []
+            imported += self.import_batch(batch)
+        self.stdout.write(f"Imported {imported} posts")
+
+    def import_batch(self, rows):
+        if not rows:
+            return 0
+        usernames = {row["author"] for row in rows}
+        authors = User.objects.in_bulk(usernames, field_name="username")
+        unknown = usernames - set(authors)
+        if unknown:
+            raise CommandError(f"unknown authors: {', '.join(sorted(unknown))}")
+
+        with transaction.atomic():
+            for row in rows:
+                post = Post.objects.create(
+                    title=row["title"], content=row["content"], author=authors[row["author"]]
+                )
+                sync_tags(post, row.get("tags", []))
+        return len(rows)
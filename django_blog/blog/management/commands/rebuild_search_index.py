@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog search index from scratch (e.g. after a bulk import)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild_index(options["batch_size"])
+        self.stdout.write(f"Indexed {indexed} posts")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog import cache, tags
+
+
+class Command(BaseCommand):
+    help = "Recompute tag post counts and activity scores, a batch of tags at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Tags recomputed per transaction.")
+
+    def handle(self, *args, **options):
+        processed = tags.rebuild_stats(options["batch_size"])
+        cache.bump("tags")
+        self.stdout.write(f"Rebuilt stats for {processed} tags")
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_post_counts(apps, schema_editor):
+    # Activity scores need post dates; `manage.py rebuild_tag_stats` fills them
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TagStat = apps.get_model('blog', 'TagStat')
+    post_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if post_type is None:
+        return
+    counts = (
+        TaggedItem.objects.filter(content_type=post_type)
+        .values('tag_id').annotate(n=Count('id'))
+    )
+    TagStat.objects.bulk_create(
+        [TagStat(tag_id=row['tag_id'], post_count=row['n']) for row in counts],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_search_index'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('activity_score', models.FloatField(default=0)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count'], name='tagstat_post_count_idx'), models.Index(fields=['-activity_score'], name='tagstat_activity_idx')],
+            },
+        ),
+        migrations.RunPython(populate_post_counts, migrations.RunPython.noop),
+    ]
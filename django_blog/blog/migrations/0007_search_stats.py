@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:01
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_search_stats(apps, schema_editor):
+    SearchDocument = apps.get_model('blog', 'SearchDocument')
+    SearchStats = apps.get_model('blog', 'SearchStats')
+    totals = SearchDocument.objects.aggregate(n=Count('id'), length=Sum('length'))
+    SearchStats.objects.create(
+        pk=1, document_count=totals['n'], total_length=totals['length'] or 0
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_tag_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_count', models.PositiveIntegerField(default=0)),
+                ('total_length', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_search_stats, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 
 class Post(models.Model):
@@ -29,5 +30,46 @@ class Comment(models.Model):
         return f'Comment by {self.author.username} on {self.post.title}'
 
 
+# Search index, maintained by blog/search.py
+class SearchDocument(models.Model):
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='search_document')
+    length = models.PositiveIntegerField(default=0)  # tokens indexed for the post
+
+
+class SearchPosting(models.Model):
+    token = models.CharField(max_length=64)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='search_postings')
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'post'], name='search_posting_token_post_uniq'),
+        ]
+
+
+# Totals over SearchDocument for BM25, one row kept current by blog/search.py
+class SearchStats(models.Model):
+    document_count = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+
 
 # Create your models here.
+
+
+# Tag popularity, maintained by blog/tags.py
+class TagStat(models.Model):
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name='stat')
+    post_count = models.PositiveIntegerField(default=0)
+    # Sum of 2 ** (age in half-lives since ACTIVITY_EPOCH) per tagging, see tags.py
+    activity_score = models.FloatField(default=0)
+    last_used = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-post_count'], name='tagstat_post_count_idx'),
+            models.Index(fields=['-activity_score'], name='tagstat_activity_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tag_id}: {self.post_count} posts'
@@ -0,0 +1,192 @@
+"""
+Blog search backed by an inverted index.
+
+Every post is tokenized once, when it (or its tags) change, into
+SearchPosting rows (token -> post, frequency) plus a SearchDocument holding
+its length. A search then only reads the postings of the query's tokens
+through the (token, post) index instead of scanning titles, content and the
+tag join with icontains/DISTINCT. Results are ranked with BM25 and all query
+tokens must match. Title tokens count twice.
+
+The document count and total length BM25 needs are kept in the SearchStats
+row as posts are indexed and deleted, so a search does not aggregate over
+every SearchDocument. Saves and tag changes reindex a post once, when their
+transaction commits, however many signals they sent.
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from taggit.models import TaggedItem
+
+from .models import Post, SearchDocument, SearchPosting, SearchStats
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2
+MAX_TOKEN_LENGTH = SearchPosting._meta.get_field('token').max_length
+STATS_ID = 1
+
+_pending = threading.local()
+
+
+def tokenize(text):
+    return [token[:MAX_TOKEN_LENGTH] for token in re.findall(r'\w+', text.lower())]
+
+
+def document_tokens(post, tag_names):
+    return (
+        tokenize(post.title) * TITLE_WEIGHT
+        + tokenize(post.content)
+        + [token for name in tag_names for token in tokenize(name)]
+    )
+
+
+def index_post(post):
+    """(Re)build the postings of one post."""
+    tag_names = post.tags.values_list('name', flat=True)
+    counts = Counter(document_tokens(post, tag_names))
+    length = sum(counts.values())
+    with transaction.atomic():
+        # Locked so two reindexes of the post move the totals one at a time
+        old_length = (
+            SearchDocument.objects.select_for_update().filter(post=post)
+            .values_list('length', flat=True).first()
+        )
+        SearchPosting.objects.filter(post=post).delete()
+        SearchPosting.objects.bulk_create(
+            SearchPosting(token=token, post=post, frequency=frequency)
+            for token, frequency in counts.items()
+        )
+        SearchDocument.objects.update_or_create(post=post, defaults={'length': length})
+        if old_length is None:
+            adjust_stats(1, length)
+        else:
+            adjust_stats(0, length - old_length)
+
+
+def index_on_commit(post):
+    """Reindex ``post`` when the current transaction commits, once per commit."""
+    pending = _pending.__dict__.setdefault('post_ids', set())
+    pending.add(post.pk)
+
+    def reindex():
+        if post.pk not in pending:
+            # An earlier callback of the same commit did it
+            return
+        pending.discard(post.pk)
+        fresh = Post.objects.filter(pk=post.pk).first()
+        if fresh is not None:
+            index_post(fresh)
+
+    transaction.on_commit(reindex)
+
+
+def adjust_stats(documents, length):
+    """Move the SearchStats totals by ``documents`` and ``length``."""
+    updated = SearchStats.objects.filter(pk=STATS_ID).update(
+        document_count=F('document_count') + documents,
+        total_length=F('total_length') + length,
+    )
+    if not updated:
+        recount_stats()
+
+
+def recount_stats():
+    """Recompute the SearchStats totals from the documents."""
+    totals = SearchDocument.objects.aggregate(n=Count('id'), length=Sum('length'))
+    stats, _ = SearchStats.objects.update_or_create(pk=STATS_ID, defaults={
+        'document_count': totals['n'], 'total_length': totals['length'] or 0,
+    })
+    return stats
+
+
+def rebuild_index(batch_size=500):
+    """Reindex every post; returns the number indexed."""
+    indexed = 0
+    posts = Post.objects.order_by('pk').prefetch_related('tags')
+    for post in posts.iterator(chunk_size=batch_size):
+        index_post(post)
+        indexed += 1
+    recount_stats()
+    return indexed
+
+
+def _scores(tokens):
+    """Grouped (post_id, score) rows for posts containing every token."""
+    stats = SearchStats.objects.filter(pk=STATS_ID).first() or recount_stats()
+    total = stats.document_count
+    avg_length = stats.total_length / total if stats.total_length else 1
+
+    frequencies = dict(
+        SearchPosting.objects.filter(token__in=tokens)
+        .values_list('token').annotate(n=Count('id'))
+    )
+    idf = Case(
+        *[
+            When(token=token, then=Value(math.log(1 + (total - df + 0.5) / (df + 0.5))))
+            for token, df in frequencies.items()
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    length_norm = K1 * (1 - B + B * F('post__search_document__length') / avg_length)
+    term_score = idf * F('frequency') * (K1 + 1) / (F('frequency') + length_norm)
+
+    return (
+        SearchPosting.objects.filter(token__in=tokens)
+        .values('post_id')
+        .annotate(score=Sum(term_score, output_field=FloatField()), matched=Count('token'))
+        .filter(matched=len(tokens))
+    )
+
+
+def tag_facets(matches, limit=10):
+    """Tag name/slug/count for the tags found on the matching posts."""
+    return (
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Post),
+            object_id__in=matches.values('post_id'),
+        )
+        .values('tag__name', 'tag__slug')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'tag__name')[:limit]
+    )
+
+
+def search(query, page=1, per_page=10, tag=None):
+    """
+    Run a search and return (page, facets).
+
+    The page's object_list holds Post instances in rank order, each with a
+    ``score`` attribute. ``tag`` (a tag slug) narrows the results to one facet.
+    """
+    tokens = sorted(set(tokenize(query)))
+    if not tokens:
+        # Nothing to match (empty or punctuation-only query)
+        return Paginator([], per_page).get_page(page), []
+
+    matches = _scores(tokens)
+    if tag:
+        matches = matches.filter(
+            post_id__in=TaggedItem.objects.filter(
+                content_type=ContentType.objects.get_for_model(Post), tag__slug=tag,
+            ).values('object_id')
+        )
+
+    page = Paginator(matches.order_by('-score', '-post_id'), per_page).get_page(page)
+    rows = list(page.object_list)
+    posts = Post.objects.select_related('author').in_bulk([row['post_id'] for row in rows])
+    page.object_list = []
+    for row in rows:
+        post = posts[row['post_id']]
+        post.score = row['score']
+        page.object_list.append(post)
+
+    return page, list(tag_facets(matches))
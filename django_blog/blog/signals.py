@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from . import cache, search, tags
+from .models import Comment, Post, SearchDocument
+
+
+def bump_on_commit(*dependencies):
+    # After commit, so a concurrent request cannot re-cache the old rows
+    transaction.on_commit(lambda: cache.bump(*dependencies))
+
+
+def tag_dependencies(slugs):
+    return [cache.tag_dependency(slug) for slug in slugs]
+
+
+# Search index
+# ---------------------------------------------------------
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_on_commit(instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_retagged_post(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        search.index_on_commit(instance)
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag(sender, instance, created, raw=False, **kwargs):
+    # A renamed tag changes the tokens of every post carrying it
+    if created or raw:
+        return
+    for post in Post.objects.filter(tags=instance):
+        search.index_on_commit(post)
+
+
+@receiver(post_delete, sender=SearchDocument)
+def count_removed_document(sender, instance, **kwargs):
+    search.adjust_stats(-1, -instance.length)
+
+
+# Page cache (blog/cache.py) and tag statistics (blog/tags.py)
+# ---------------------------------------------------------
+def tag_slugs(tag_ids):
+    return Tag.objects.filter(pk__in=tag_ids).values_list('slug', flat=True)
+
+
+def post_tag_ids(post):
+    return list(post.tags.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Post)
+def expire_saved_post(sender, instance, **kwargs):
+    slugs = instance.tags.values_list('slug', flat=True)
+    bump_on_commit('list', cache.post_dependency(instance.pk), *tag_dependencies(slugs))
+
+
+@receiver(pre_delete, sender=Post)
+def expire_deleted_post(sender, instance, **kwargs):
+    # Tags are still attached here, gone by post_delete
+    tag_ids = post_tag_ids(instance)
+    tags.record_tagging(tag_ids, -1)
+    bump_on_commit(
+        'list', 'tags', cache.post_dependency(instance.pk), *tag_dependencies(tag_slugs(tag_ids))
+    )
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def expire_commented_post(sender, instance, **kwargs):
+    bump_on_commit(cache.post_dependency(instance.post_id))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def retag_post(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = post_tag_ids(instance)
+        return
+    if action == 'post_clear':
+        tag_ids, delta = getattr(instance, '_cleared_tag_ids', []), -1
+    elif action in ('post_add', 'post_remove'):
+        tag_ids, delta = pk_set, 1 if action == 'post_add' else -1
+    else:
+        return
+    tags.record_tagging(tag_ids, delta)
+    bump_on_commit(
+        'tags', cache.post_dependency(instance.pk), *tag_dependencies(tag_slugs(tag_ids))
+    )
+
+
+@receiver(pre_save, sender=Tag)
+def remember_tag_slug(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_slug = Tag.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver([post_save, pre_delete], sender=Tag)
+def expire_changed_tag(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_old_slug', None) or instance.slug}
+    post_ids = Post.objects.filter(tags__pk=instance.pk).values_list('pk', flat=True)
+    bump_on_commit('tags', *tag_dependencies(slugs), *[cache.post_dependency(pk) for pk in post_ids])
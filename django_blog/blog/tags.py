@@ -0,0 +1,200 @@
+"""
+Bulk tag persistence.
+
+``post.tags.set()`` and get_or_create-per-tag cost a couple of queries for
+every tag and race when two editors create the same tag. sync_tags() does
+the whole job in a handful of queries, however many tags there are:
+
+1. one SELECT for the tags that already exist,
+2. one INSERT ... ON CONFLICT DO NOTHING for the missing ones (a
+   concurrent editor creating the same tag is not an error),
+3. one SELECT of the post's current tag ids, then one bulk INSERT and one
+   DELETE for the difference.
+
+It sends the same m2m_changed signals as the taggit manager so the search
+index, page cache and tag statistics (blog/signals.py) see every change.
+
+Tag statistics live in TagStat: a post count and an activity score that are
+moved with single UPDATEs as tags are added and removed. The activity score
+decays with a half-life of TAG_ACTIVITY_HALF_LIFE seconds without ever
+rewriting old rows: each tagging adds 2 ** (t / half-life), t counted from
+ACTIVITY_EPOCH, so a newer tagging weighs exactly as much more as it is
+fresher, and ordering by the raw score is ordering by decayed activity.
+"""
+import datetime
+import math
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+from taggit.utils import parse_tags
+
+from .models import Post, TagStat
+
+ACTIVITY_EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def clean_names(tags):
+    """Tag names from a comma-separated string or an iterable, deduplicated in order."""
+    if isinstance(tags, str):
+        tags = parse_tags(tags)
+    names = []
+    for name in tags:
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(names):
+    """Tag objects for ``names``, creating missing ones in bulk."""
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=Tag().slugify(name)) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+        # Rows skipped for a slug clash (e.g. "C++" and "C") get taggit's
+        # own de-duplicated slug
+        for name in missing:
+            if name not in tags:
+                tags[name], _ = Tag.objects.get_or_create(name=name)
+    return [tags[name] for name in names]
+
+
+def _send(action, post, tag_ids):
+    m2m_changed.send(
+        sender=Post.tags.through, instance=post, action=action, reverse=False,
+        model=Tag, pk_set=set(tag_ids), using=TaggedItem.objects.db,
+    )
+
+
+def sync_tags(post, tags):
+    """
+    Make ``post``'s tags exactly ``tags`` (names, or a comma-separated string).
+
+    Returns the (added, removed) tag id sets.
+    """
+    wanted = {tag.pk for tag in get_or_create_tags(clean_names(tags))}
+    content_type = ContentType.objects.get_for_model(Post)
+    items = TaggedItem.objects.filter(content_type=content_type, object_id=post.pk)
+
+    with transaction.atomic():
+        current = set(items.values_list('tag_id', flat=True))
+        added, removed = wanted - current, current - wanted
+        if added:
+            _send('pre_add', post, added)
+            TaggedItem.objects.bulk_create(
+                [TaggedItem(content_type=content_type, object_id=post.pk, tag_id=tag_id)
+                 for tag_id in added],
+                ignore_conflicts=True,
+            )
+            _send('post_add', post, added)
+        if removed:
+            _send('pre_remove', post, removed)
+            items.filter(tag_id__in=removed).delete()
+            _send('post_remove', post, removed)
+    getattr(post, '_prefetched_objects_cache', {}).pop('tags', None)
+    return added, removed
+
+
+# Statistics
+# ---------------------------------------------------------
+def half_life():
+    return getattr(settings, 'TAG_ACTIVITY_HALF_LIFE', 7 * 24 * 3600)
+
+
+def activity_weight(when):
+    # Floats overflow after ~1000 half-lives: about 19 years at the default
+    return 2 ** ((when - ACTIVITY_EPOCH).total_seconds() / half_life())
+
+
+def current_activity(score, now=None):
+    """A raw activity_score expressed as "taggings this half-life"."""
+    now = now or timezone.now()
+    return score / activity_weight(now)
+
+
+def record_tagging(tag_ids, delta):
+    """Move the stats of ``tag_ids`` for ``delta`` (+1/-1) taggings, in two queries."""
+    if not tag_ids:
+        return
+    TagStat.objects.bulk_create(
+        [TagStat(tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True
+    )
+    stats = TagStat.objects.filter(tag_id__in=tag_ids)
+    if delta > 0:
+        now = timezone.now()
+        stats.update(
+            post_count=F('post_count') + delta,
+            activity_score=F('activity_score') + delta * activity_weight(now),
+            last_used=now,
+        )
+    else:
+        stats.filter(post_count__gte=-delta).update(post_count=F('post_count') + delta)
+
+
+def tag_cloud(limit=50, order='activity'):
+    """
+    The ``limit`` top tags by ``order`` ("activity" or "posts"), each with a
+    ``weight`` from 1 to 5 for sizing, in name order.
+    """
+    field = '-activity_score' if order == 'activity' else '-post_count'
+    stats = list(
+        TagStat.objects.filter(post_count__gt=0).select_related('tag')
+        .order_by(field, 'tag__name')[:limit]
+    )
+    if not stats:
+        return []
+    value = (lambda stat: stat.activity_score) if order == 'activity' else (lambda stat: stat.post_count)
+    # Log scale, so one runaway tag does not flatten the rest
+    low, high = math.log1p(min(map(value, stats))), math.log1p(max(map(value, stats)))
+    for stat in stats:
+        spread = (math.log1p(value(stat)) - low) / (high - low) if high > low else 1
+        stat.weight = 1 + round(spread * 4)
+        stat.activity = current_activity(stat.activity_score)
+    return sorted(stats, key=lambda stat: stat.tag.name.lower())
+
+
+def rebuild_stats(batch_size=500):
+    """
+    Recompute every TagStat from the tagged posts, streaming tags in
+    primary-key batches. A tagging's time is its post's publication date.
+    Returns the number of tags processed.
+    """
+    post_type = ContentType.objects.get_for_model(Post)
+    processed = 0
+    last_id = 0
+    while True:
+        tag_ids = list(
+            Tag.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not tag_ids:
+            return processed
+        last_id = tag_ids[-1]
+
+        stats = {tag_id: TagStat(tag_id=tag_id) for tag_id in tag_ids}
+        taggings = (
+            TaggedItem.objects.filter(content_type=post_type, tag_id__in=tag_ids)
+            .annotate(published=Subquery(
+                Post.objects.filter(pk=OuterRef('object_id')).values('published_date')
+            ))
+            .values_list('tag_id', 'published')
+        )
+        for tag_id, published in taggings.iterator(chunk_size=2000):
+            stat = stats[tag_id]
+            stat.post_count += 1
+            if published:
+                stat.activity_score += activity_weight(published)
+                stat.last_used = max(filter(None, [stat.last_used, published]))
+        with transaction.atomic():
+            TagStat.objects.filter(tag_id__in=tag_ids).delete()
+            TagStat.objects.bulk_create(stats.values())
+        processed += len(tag_ids)
@@ -1,3 +1,339 @@
-from django.test import TestCase
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import search
+from .models import Comment, Post, SearchDocument, SearchPosting, SearchStats, TagStat
+from .tags import current_activity, sync_tags, tag_cloud
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer', password='pass12345')
+        # Posts are reindexed when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title = Post.objects.create(
+                author=self.author, title='Django signals', content='Hooks for saves.'
+            )
+            self.in_content = Post.objects.create(
+                author=self.author, title='Weekend notes', content='Read about Django forms.'
+            )
+            self.other = Post.objects.create(author=self.author, title='Cooking', content='Pasta.')
+            self.in_title.tags.add('python', 'django')
+            self.in_content.tags.add('python')
+
+    def ids(self, page):
+        return [post.pk for post in page.object_list]
+
+    def test_ranks_with_bm25_and_requires_every_token(self):
+        page, _ = search.search('django')
+        self.assertEqual(self.ids(page), [self.in_title.pk, self.in_content.pk])
+        page, _ = search.search('django forms')
+        self.assertEqual(self.ids(page), [self.in_content.pk])
+
+    def test_index_follows_edits_and_tags(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.title = 'Django pasta'
+            self.other.save()
+        self.assertIn(self.other.pk, self.ids(search.search('pasta django')[0]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.tags.add('kitchen')
+        self.assertEqual(self.ids(search.search('kitchen')[0]), [self.other.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.tags.clear()
+        self.assertEqual(self.ids(search.search('kitchen')[0]), [])
+
+        self.other.delete()
+        self.assertFalse(SearchPosting.objects.filter(post_id=self.other.pk).exists())
+
+    def test_stats_follow_the_documents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.content = 'Pasta with a much longer description this time.'
+            self.other.save()
+        self.in_content.delete()
+        stats = SearchStats.objects.get()
+        self.assertEqual(
+            (stats.document_count, stats.total_length),
+            (2, sum(SearchDocument.objects.values_list('length', flat=True))),
+        )
+        with CaptureQueriesContext(connection) as queries:
+            search.search('django')
+        # Only joined for the scored posts' lengths, never aggregated
+        self.assertFalse([q for q in queries if 'FROM "blog_searchdocument"' in q['sql']])
+
+    def test_a_change_is_reindexed_once(self):
+        with mock.patch.object(search, 'index_post', wraps=search.index_post) as index_post:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.other.save()
+                sync_tags(self.other, 'kitchen, italian')
+                sync_tags(self.other, 'kitchen')
+        self.assertEqual(index_post.call_count, 1)
+        self.assertEqual(self.ids(search.search('kitchen')[0]), [self.other.pk])
+
+    def test_tag_facets_and_drill_down(self):
+        page, facets = search.search('django')
+        self.assertEqual(
+            [(facet['tag__slug'], facet['count']) for facet in facets],
+            [('python', 2), ('django', 1)],
+        )
+        page, _ = search.search('django', tag='django')
+        self.assertEqual(self.ids(page), [self.in_title.pk])
+
+    def test_queries_without_tokens_find_nothing(self):
+        for query in ('', '!!!'):
+            response = self.client.get(reverse('search'), {'q': query})
+            self.assertEqual(response.status_code, 200, query)
+            self.assertEqual(list(response.context['posts']), [])
+            self.assertEqual(response.context['facets'], [])
+
+    def test_view_paginates_results(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(12):
+                Post.objects.create(author=self.author, title=f'Django {i}', content='...')
+        response = self.client.get(reverse('search'), {'q': 'django', 'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 14)
+        self.assertEqual(len(response.context['posts']), 4)
+
+
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='First', content='...')
+        self.other = Post.objects.create(author=self.author, title='Second', content='...')
+        self.post.tags.add('django')
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def test_hits_run_no_queries_and_edits_evict_exactly_their_pages(self):
+        detail = reverse('post-detail', args=[self.post.pk])
+        other = reverse('post-detail', args=[self.other.pk])
+        for url in (detail, other, reverse('post-list')):
+            self.get(url)
+
+        with self.assertNumQueries(0):
+            self.assertContains(self.get(detail), 'First')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+
+        self.assertContains(self.get(detail), 'Edited')
+        self.assertContains(self.get(reverse('post-list')), 'Edited')
+        with self.assertNumQueries(0):
+            self.get(other)
+
+    def test_comments_and_tags_evict_their_pages(self):
+        detail = reverse('post-detail', args=[self.post.pk])
+        tag_page = reverse('posts-by-tag', args=['django'])
+        first_detail, first_tag = self.get(detail)['ETag'], self.get(tag_page)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.author, content='Hi')
+        self.assertNotEqual(self.get(detail)['ETag'], first_detail)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.tags.add('django')
+        self.assertContains(self.get(tag_page), 'Second')
+        self.assertNotEqual(self.get(tag_page)['ETag'], first_tag)
+
+    def test_current_etag_gets_304_without_queries(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        etag = self.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_signed_in_users_get_their_own_copy(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        anonymous = self.get(url)['ETag']
+        self.client.force_login(self.author)
+        response = self.get(url)
+        self.assertNotEqual(response['ETag'], anonymous)
+        self.assertContains(response, 'Edit')
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                       'LOCATION': location}
+            with override_settings(CACHES={'default': backend}):
+                url = reverse('post-detail', args=[self.post.pk])
+                self.get(url)
+                with self.assertNumQueries(0):
+                    self.assertContains(self.get(url), 'First')
+
+
+class QueryBudgetMixin:
+    """Render pages uncached and hold their query counts to a fixed budget."""
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertQueryBudget(self, url, budget):
+        count = self.count_queries(url)
+        self.assertEqual(count, budget, f'{url} ran {count} queries, budget is {budget}')
+
+
+@override_settings(BLOG_POSTS_PER_PAGE=5, BLOG_COMMENTS_PER_PAGE=5)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def seed(self, posts, comments_per_post):
+        authors = [User.objects.create_user(username=f'author{i}') for i in range(3)]
+        created = []
+        for i in range(posts):
+            post = Post.objects.create(author=authors[i % 3], title=f'Post {i}', content='...')
+            post.tags.add('django', f'tag{i}')
+            Comment.objects.bulk_create(
+                Comment(post=post, author=authors[j % 3], content='Nice')
+                for j in range(comments_per_post)
+            )
+            created.append(post)
+        return created
+
+    def test_list_pages(self):
+        self.seed(12, 0)
+        # COUNT + one page of posts with their authors
+        self.assertQueryBudget(reverse('post-list'), 2)
+        self.assertQueryBudget(reverse('post-list') + '?page=2', 2)
+        # Plus the tag itself
+        self.assertQueryBudget(reverse('posts-by-tag', args=['django']), 3)
+
+    def test_detail_page_with_many_comments(self):
+        small, busy = self.seed(2, 1)
+        Comment.objects.bulk_create(
+            Comment(post=busy, author=busy.author, content='More') for _ in range(200)
+        )
+        # Post with author, tags, comment COUNT, one page of comments with authors
+        for post in (small, busy):
+            self.assertQueryBudget(reverse('post-detail', args=[post.pk]), 4)
+
+    def test_signed_in_author_costs_a_fixed_extra(self):
+        post, = self.seed(1, 30)
+        self.client.force_login(post.author)
+        # Session and user lookups on top of the anonymous budget
+        self.assertQueryBudget(reverse('post-detail', args=[post.pk]), 6)
+
+
+class TagSyncTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Hi', content='...')
+
+    def names(self, post):
+        return sorted(post.tags.names())
+
+    def queries_to_sync(self, post, tags):
+        with CaptureQueriesContext(connection) as queries:
+            sync_tags(post, tags)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_tags(self):
+        other = Post.objects.create(author=self.author, title='Other', content='...')
+        few = self.queries_to_sync(self.post, [f'few{i}' for i in range(3)])
+        many = self.queries_to_sync(other, [f'many{i}' for i in range(30)])
+        self.assertEqual(few, many)
+        self.assertEqual(len(self.names(other)), 30)
+
+    def test_diffs_against_current_tags_and_reuses_existing(self):
+        self.post.tags.add('keep', 'drop')
+        added, removed = sync_tags(self.post, 'keep, new, new')
+        self.assertEqual(self.names(self.post), ['keep', 'new'])
+        self.assertEqual((len(added), len(removed)), (1, 1))
+        self.assertEqual(sync_tags(self.post, ['new', 'keep']), (set(), set()))
+
+    def test_slug_clashes_fall_back_to_taggit_slugs(self):
+        sync_tags(self.post, ['C', 'C++'])
+        self.assertEqual(self.names(self.post), ['C', 'C++'])
+
+    def test_views_and_search_index_see_the_tags(self):
+        self.client.force_login(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('post-update', args=[self.post.pk]),
+                {'title': 'Hi', 'content': '...', 'tags': 'alpha, beta'},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.names(self.post), ['alpha', 'beta'])
+        self.assertEqual([post.pk for post in search.search('beta')[0].object_list], [self.post.pk])
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as source:
+            for i in range(3):
+                row = {'title': f'Imported {i}', 'content': '...', 'author': 'writer',
+                       'tags': ['imported', f'n{i}']}
+                source.write(json.dumps(row) + '\n')
+            source.flush()
+            call_command('import_posts', source.name, batch_size=2, stdout=open('/dev/null', 'w'))
+        self.assertEqual(Post.objects.filter(tags__name='imported').count(), 3)
+
+
+class TagStatTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='pass12345')
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='...')
+            for i in range(3)
+        ]
+
+    def stat(self, slug):
+        return TagStat.objects.get(tag__slug=slug)
+
+    def test_counts_follow_tag_changes(self):
+        for post in self.posts:
+            post.tags.add('Django')
+        sync_tags(self.posts[0], ['python'])
+        self.posts[1].tags.clear()
+        self.assertEqual(self.stat('django').post_count, 1)
+        self.assertEqual(self.stat('python').post_count, 1)
+
+        self.posts[2].delete()
+        self.assertEqual(self.stat('django').post_count, 0)
+
+    def test_activity_counts_recent_taggings(self):
+        self.posts[0].tags.add('django', 'python')
+        self.posts[1].tags.add('django')
+        self.assertAlmostEqual(current_activity(self.stat('django').activity_score), 2, places=3)
+        cloud = tag_cloud()
+        self.assertEqual([stat.tag.slug for stat in cloud], ['django', 'python'])
+        self.assertEqual([stat.weight for stat in cloud], [5, 1])
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.posts[0].tags.add('django', 'python')
+        self.posts[1].tags.add('django')
+        TagStat.objects.update(post_count=42, activity_score=0)
+        call_command('rebuild_tag_stats', batch_size=1, stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.stat('django').post_count, 2)
+        self.assertGreater(self.stat('django').activity_score, self.stat('python').activity_score)
+
+    def test_tag_pages_use_slugs(self):
+        self.posts[0].tags.add('Machine Learning')
+        response = self.client.get(reverse('posts-by-tag', args=['Machine Learning']))
+        self.assertRedirects(response, reverse('posts-by-tag', args=['machine-learning']),
+                             status_code=301)
+        self.assertContains(self.client.get(reverse('posts-by-tag', args=['machine-learning'])),
+                            'Post 0')
+        self.assertContains(self.client.get(reverse('tag-cloud')), 'Machine Learning')
+
+    def test_unsluggable_tags_are_not_found(self):
+        for name in ['+++', '!!']:
+            self.assertEqual(self.client.get(reverse('posts-by-tag', args=[name])).status_code, 404)
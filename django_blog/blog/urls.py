@@ -3,7 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),
-    path('tags/<slug:tag_slug>/', posts_by_tag, name='posts-by-tag'),
+    path('tags/', views.tag_cloud_view, name='tag-cloud'),
+    path('tags/<str:tag_slug>/', views.posts_by_tag, name='posts-by-tag'),
     path('search/', views.search_view, name='search'),
 
 
@@ -1,13 +1,22 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q
 from django.contrib.auth import authenticate,login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from taggit.models import Tag
 from .forms import PostForm, CommentForm, CustomUserCreationForm
 from .models import Post, Comment
+from . import search
+from .tags import sync_tags, tag_cloud
+from .cache import (
+    CachedPageMixin, cache_page_on, fragment_context, post_dependency, tag_dependency,
+)
 
 # Redirect home to posts list
 def home(request):
@@ -38,24 +47,59 @@ def logout_view(request):
 def profile_view(request):
     return render(request, 'blog/profile.html', {'user': request.user})
 
-def posts_by_tag(request, tag_name):
-    posts = Post.objects.filter(tags__name__iexact=tag_name)
-    return render(request, "blog/posts_by_tag.html", {"posts": posts, "tag_name": tag_name})
 
-
-
-class PostListView(ListView):
+class PostListView(CachedPageMixin, ListView):
     model = Post
     template_name = "blog/post_list.html"
     context_object_name = "posts"
     ordering = ["-id"]
+    cache_name = "post-list"
 
-class PostDetailView(DetailView):
+    def get_paginate_by(self, queryset):
+        return settings.BLOG_POSTS_PER_PAGE
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("author")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(fragment_context(["list"]))
+        return context
+
+class PostDetailView(CachedPageMixin, DetailView):
     model = Post
     template_name = "blog/post_detail.html"
     context_object_name = "post"
+    cache_name = "post-detail"
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+    def get_cache_dependencies(self):
+        return [post_dependency(self.kwargs["pk"])]
+
+    def get_queryset(self):
+        return Post.objects.select_related("author").prefetch_related("tags")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comments = self.object.comments.select_related("author").order_by("created_at", "id")
+        context["comments"] = Paginator(comments, settings.BLOG_COMMENTS_PER_PAGE).get_page(
+            self.request.GET.get("comments_page")
+        )
+        return context
+
+class TagSyncMixin:
+    """Save a PostForm, persisting its tags in bulk with blog/tags.py."""
+
+    def form_valid(self, form):
+        # One transaction, so the search index is rebuilt once for the post
+        # and its tags (blog/search.py)
+        with transaction.atomic():
+            self.object = form.save(commit=False)
+            self.object.save()
+            sync_tags(self.object, form.cleaned_data.get("tags", []))
+        return redirect(self.get_success_url())
+
+
+class PostCreateView(LoginRequiredMixin, TagSyncMixin, CreateView):
     model = Post
     template_name = "blog/post_form.html"
     form_class = PostForm
@@ -66,21 +110,18 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 
 
 
-def posts_by_tag(request, tag_slug):
-    posts = Post.objects.filter(tags__slug__iexact=tag_slug)
-    return render(request, "blog/posts_by_tag.html", {
-        "posts": posts,
-        "tag_name": tag_slug
-    })
-
-
-# Search view
+# Search view, served from the inverted index in blog/search.py
 def search_view(request):
     query = request.GET.get('q', '')
-    results = Post.objects.filter(
-        Q(title__icontains=query) | Q(content__icontains=query) | Q(tags__name__icontains=query)
-    ).distinct()
-    return render(request, 'blog/search_results.html', {'results': results, 'query': query})
+    tag = request.GET.get('tag', '')
+    page, facets = search.search(query, page=request.GET.get('page'), tag=tag)
+    return render(request, 'blog/search_results.html', {
+        'posts': page.object_list,
+        'page_obj': page,
+        'facets': facets,
+        'query': query,
+        'tag': tag,
+    })
 
 
 '''class PostCreateView(LoginRequiredMixin, CreateView):
@@ -92,24 +133,11 @@ def search_view(request):
         form.instance.author = self.request.user
         return super().form_valid(form)'''
 
-class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, TagSyncMixin, UpdateView):
     model = Post
     template_name = "blog/post_form.html"
     form_class = PostForm
 
-    def form_valid(self, form):
-        response = super().form_valid(form)
-        self.save_tags(form.cleaned_data.get('tags_field', ''), self.object)
-        return response
-
-    def save_tags(self, tags_string, post):
-        names = [t.strip() for t in tags_string.split(',') if t.strip()]
-        tags = []
-        for name in names:
-            tag, created = Tag.objects.get_or_create(name=name)
-            tags.append(tag)
-        post.tags.set(tags)
-
     def test_func(self):
         return self.get_object().author == self.request.user
 
@@ -124,18 +152,38 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == post.author
 
 
-def posts_by_tag(request, tag_name):
-    posts = Post.objects.filter(tags__name__iexact=tag_name)
-    return render(request, "blog/post_list.html", {"posts": posts, "tag_name": tag_name})
+def tag_slug_of(value):
+    # Old links carry the tag name ("Django", "machine learning"); slugs are
+    # stored lower-case and unique, so an exact match can use the index
+    return Tag().slugify(value)
+
 
-def search(request):
-    q = request.GET.get("q", "")
-    posts = Post.objects.filter(
-        Q(title__icontains=q) |
-        Q(content__icontains=q) |
-        Q(tags__name__icontains=q)
-    ).distinct()
-    return render(request, "blog/search_results.html", {"posts": posts, "query": q})
+@cache_page_on(lambda tag_slug: [tag_dependency(tag_slug_of(tag_slug))])
+def posts_by_tag(request, tag_slug):
+    slug = tag_slug_of(tag_slug)
+    if not slug:
+        # Nothing sluggable ("+++"); there is no tag page to redirect to
+        raise Http404("No such tag")
+    if slug != tag_slug:
+        return redirect("posts-by-tag", tag_slug=slug, permanent=True)
+    tag = Tag.objects.filter(slug=slug).first()
+    posts = Post.objects.filter(tags__slug=slug).select_related("author").order_by("-id")
+    page = Paginator(posts, settings.BLOG_POSTS_PER_PAGE).get_page(request.GET.get("page"))
+    return render(request, "blog/post_list.html", {
+        "posts": page.object_list,
+        "page_obj": page,
+        "tag_name": tag.name if tag else slug,
+        **fragment_context([tag_dependency(slug)]),
+    })
+
+
+@cache_page_on(lambda: ["tags"])
+def tag_cloud_view(request):
+    order = "posts" if request.GET.get("order") == "posts" else "activity"
+    return render(request, "blog/tag_cloud.html", {
+        "tags": tag_cloud(order=order),
+        "order": order,
+    })
 
 
 def register_view(request):
@@ -158,7 +206,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     template_name = "blog/comment_form.html"
 
     def form_valid(self, form):
-        post_id = self.kwargs['post_id']
+        post_id = self.kwargs['pk']
         form.instance.author = self.request.user
         form.instance.post = get_object_or_404(Post, id=post_id)
         return super().form_valid(form)
@@ -319,7 +367,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     template_name = "blog/comment_form.html"
 
     def form_valid(self, form):
-        post_id = self.kwargs['post_id']
+        post_id = self.kwargs['pk']
         form.instance.author = self.request.user
         form.instance.post = get_object_or_404(Post, id=post_id)
         return super().form_valid(form)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -123,6 +124,33 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Page and fragment cache (blog/cache.py). Local memory by default; set
+# BLOG_CACHE_DIR to use a file-based cache shared by all worker processes.
+if os.environ.get('BLOG_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['BLOG_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'blog',
+        }
+    }
+
+# Seconds a cached page or fragment lives; edits evict them sooner
+BLOG_CACHE_TIMEOUT = 600
+
+# Page sizes for post lists and the comments under a post
+BLOG_POSTS_PER_PAGE = 10
+BLOG_COMMENTS_PER_PAGE = 20
+
+# Seconds for a tag's activity score to halve (tag cloud ordering)
+TAG_ACTIVITY_HALF_LIFE = 7 * 24 * 3600
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
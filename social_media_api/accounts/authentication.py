@@ -0,0 +1,165 @@
+"""
+Token authentication that skips the Token/User join on repeat requests.
+
+Resolved users are kept in two tiers: a bounded per-process LRU
+(TOKEN_AUTH_LOCAL_SIZE entries for TOKEN_AUTH_LOCAL_TTL seconds) in front
+of the shared Django cache (TOKEN_AUTH_SHARED_TTL seconds). Both tiers are
+keyed by a hash of the token, never the token itself.
+
+Every entry records its user's auth epoch, a per-user number in the shared
+cache that accounts/signals.py bumps when one of the user's tokens is
+deleted (logout, regeneration) or the user is saved (deactivation, profile
+edits) or deleted. A request reads that one number and ignores entries
+from an older epoch, so invalidation reaches every worker at once without
+having to find the entries. That only holds when the workers share the
+cache, so both tiers are skipped (every request reads the token and user
+rows) unless social_media_api.caching.cache_is_shared(); with the default
+local-memory cache each worker would keep its own epochs. Changes made with
+QuerySet.update() send no signal; call invalidate_user() after them.
+
+Cached users leave out DEFERRED_FIELDS: the follow counters move with F()
+updates and would go stale, and password hashes stay out of the shared
+cache. Reading one of them loads it from the database.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from social_media_api.caching import cache_is_shared
+
+TOKEN_PREFIX = "auth:token:"
+EPOCH_PREFIX = "auth:epoch:"
+DEFERRED_FIELDS = ("password", "follower_count", "following_count")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LocalCache:
+    """Thread-safe LRU of key -> (value, epoch) with a time to live."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, epoch, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, epoch
+
+    def set(self, key, value, epoch):
+        ttl = _setting("TOKEN_AUTH_LOCAL_TTL", 60)
+        size = _setting("TOKEN_AUTH_LOCAL_SIZE", 10_000)
+        if ttl <= 0 or size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, epoch, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_cache = LocalCache()
+
+
+def _digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def user_epoch(user_id):
+    key = f"{EPOCH_PREFIX}{user_id}"
+    epoch = cache.get(key)
+    if epoch is None:
+        # A time-based start: an epoch evicted from the cache never comes
+        # back with a value old entries were stored under
+        cache.add(key, time.time_ns(), None)
+        epoch = cache.get(key)
+    return epoch
+
+
+def invalidate_user(user_id):
+    """Drop every cached authentication of ``user_id`` in every worker sharing the cache."""
+    key = f"{EPOCH_PREFIX}{user_id}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in TokenAuthentication; ``request.auth`` is an unsaved Token
+    carrying the key and user.
+    """
+
+    def authenticate_credentials(self, key):
+        if not cache_is_shared():
+            user = self.load_user(self.token_user_id(key))
+            return user, Token(key=key, user=user)
+
+        digest = _digest(key)
+        entry = local_cache.get(digest)
+        from_shared = False
+        if entry is None:
+            entry = cache.get(TOKEN_PREFIX + digest)
+            from_shared = entry is not None
+
+        if entry is not None:
+            user, epoch = entry
+            if epoch != user_epoch(user.pk):
+                entry = None
+
+        if entry is None:
+            # The epoch is read before the user row: a change committing in
+            # between bumps it past the epoch this entry is stored under
+            user_id = self.token_user_id(key)
+            epoch = user_epoch(user_id)
+            user = self.load_user(user_id)
+            cache.set(TOKEN_PREFIX + digest, (user, epoch), _setting("TOKEN_AUTH_SHARED_TTL", 300))
+            local_cache.set(digest, user, epoch)
+        elif from_shared:
+            local_cache.set(digest, user, epoch)
+
+        # Views may attach caches to request.user; keep them off the shared copy
+        user = copy.copy(user)
+        return user, Token(key=key, user=user)
+
+    def token_user_id(self, key):
+        user_id = self.get_model().objects.filter(key=key).values_list("user_id", flat=True).first()
+        if user_id is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        return user_id
+
+    def load_user(self, user_id):
+        user = (
+            get_user_model().objects.defer(*DEFERRED_FIELDS)
+            .filter(pk=user_id, is_active=True).first()
+        )
+        if user is None:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return user
@@ -0,0 +1,120 @@
+"""
+Follow/unfollow with maintained follower and following counters.
+
+Each function writes the through-table rows and the counters in one
+transaction and reports what changed, so repeated calls never double count.
+They send the same m2m_changed signal as ``user.following.add()``/
+``.remove()`` so receivers (e.g. home timelines) see every follow, whichever
+path created it.
+
+Every change holds the follower's user row until it commits. The bulk
+functions rely on that: the follows they read before writing are still the
+ones there when they count what they wrote.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed
+
+from .models import CustomUser
+
+Follow = CustomUser.following.through
+
+BULK_BATCH_SIZE = 1000
+
+
+def _send(action, user, target_ids):
+    m2m_changed.send(
+        sender=Follow, instance=user, action=action, reverse=False,
+        model=CustomUser, pk_set=set(target_ids), using=Follow.objects.db,
+    )
+
+
+def _lock(user_id):
+    list(CustomUser.objects.select_for_update().filter(pk=user_id).values_list("pk"))
+
+
+def _bump(follower_id, target_ids, delta):
+    CustomUser.objects.filter(pk=follower_id).update(
+        following_count=F("following_count") + delta * len(target_ids)
+    )
+    CustomUser.objects.filter(pk__in=target_ids).update(
+        follower_count=F("follower_count") + delta
+    )
+
+
+def follow(user, target):
+    """Make ``user`` follow ``target``; return True if this is a new follow."""
+    with transaction.atomic():
+        _lock(user.pk)
+        _, created = Follow.objects.get_or_create(
+            from_customuser_id=user.pk, to_customuser_id=target.pk
+        )
+        if created:
+            _bump(user.pk, [target.pk], 1)
+    if created:
+        _send("post_add", user, [target.pk])
+    return created
+
+
+def unfollow(user, target):
+    """Make ``user`` stop following ``target``; return True if they did follow."""
+    with transaction.atomic():
+        _lock(user.pk)
+        deleted, _ = Follow.objects.filter(
+            from_customuser_id=user.pk, to_customuser_id=target.pk
+        ).delete()
+        if deleted:
+            _bump(user.pk, [target.pk], -1)
+    if deleted:
+        _send("post_remove", user, [target.pk])
+    return bool(deleted)
+
+
+def _followed(user_id, target_ids):
+    return set(
+        Follow.objects.filter(from_customuser_id=user_id, to_customuser_id__in=target_ids)
+        .values_list("to_customuser_id", flat=True)
+    )
+
+
+def follow_many(user, target_ids):
+    """
+    Make ``user`` follow every id in ``target_ids``; return the set of ids
+    that are new follows. ``user`` itself is skipped.
+    """
+    target_ids = set(target_ids) - {user.pk}
+    if not target_ids:
+        return set()
+    with transaction.atomic():
+        _lock(user.pk)
+        new = target_ids - _followed(user.pk, target_ids)
+        Follow.objects.bulk_create(
+            [Follow(from_customuser_id=user.pk, to_customuser_id=target_id) for target_id in new],
+            batch_size=BULK_BATCH_SIZE, ignore_conflicts=True,
+        )
+        if new:
+            _bump(user.pk, new, 1)
+    if new:
+        _send("post_add", user, new)
+    return new
+
+
+def unfollow_many(user, target_ids):
+    """
+    Make ``user`` stop following every id in ``target_ids``; return the set
+    of ids they did follow.
+    """
+    target_ids = set(target_ids) - {user.pk}
+    if not target_ids:
+        return set()
+    with transaction.atomic():
+        _lock(user.pk)
+        removed = _followed(user.pk, target_ids)
+        if removed:
+            Follow.objects.filter(
+                from_customuser_id=user.pk, to_customuser_id__in=removed
+            ).delete()
+            _bump(user.pk, removed, -1)
+    if removed:
+        _send("post_remove", user, removed)
+    return removed
@@ -0,0 +1,145 @@
+"""
+Cached follow graph.
+
+Each user's following and follower ids are kept in the cache as sorted
+64-bit arrays, 8 bytes an id, and come back as frozensets, so "does A
+follow B" is a set lookup once the set is loaded. Sets for many users load
+with one get_many() plus, for the ones missing, one query against the
+through table.
+
+Keys carry a per-user graph version that accounts/signals.py bumps after
+commit on every follow change (m2m_changed, which accounts.follows sends as
+well). A stale set is never read again; it just expires. A reader racing
+a follow can only write under the old version. Versions only reach other
+workers through a shared cache: unless social_media_api.caching says the
+cache is shared, sets are read straight from the through table, since a
+local-memory cache would keep serving an unfollow or block to the other
+workers for up to FOLLOW_GRAPH_CACHE_TIMEOUT.
+
+Mutual follows are an intersection of two cached sets. Suggestions count
+how often users appear in the following sets of the people a user follows
+(friends of friends), reading at most SUGGESTION_SOURCES of those sets;
+neither walks the through table.
+"""
+import time
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from social_media_api.caching import cache_is_shared
+
+from .models import CustomUser
+
+Follow = CustomUser.following.through
+
+VERSION_PREFIX = "graph:version:"
+FOLLOWING = "following"
+FOLLOWERS = "followers"
+SUGGESTION_SOURCES = 200
+
+
+def _timeout():
+    return getattr(settings, "FOLLOW_GRAPH_CACHE_TIMEOUT", 3600)
+
+
+def _versions(user_ids):
+    keys = {user_id: f"{VERSION_PREFIX}{user_id}" for user_id in user_ids}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for user_id, key in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+        versions[user_id] = found[key]
+    return versions
+
+
+def bump(*user_ids):
+    """Invalidate the cached sets of ``user_ids``."""
+    # Versions start from the clock, so a deleted version comes back newer
+    # than any set stored under it; one round trip for a bulk follow
+    cache.delete_many([f"{VERSION_PREFIX}{user_id}" for user_id in set(user_ids)])
+
+
+def _encode(ids):
+    return array("q", sorted(ids)).tobytes()
+
+
+def _decode(data):
+    ids = array("q")
+    ids.frombytes(data)
+    return frozenset(ids)
+
+
+def _load(direction, user_ids):
+    """{user_id: frozenset} straight from the through table, one query."""
+    if direction == FOLLOWING:
+        own, other = "from_customuser_id", "to_customuser_id"
+    else:
+        own, other = "to_customuser_id", "from_customuser_id"
+    found = {user_id: [] for user_id in user_ids}
+    rows = Follow.objects.filter(**{f"{own}__in": user_ids}).values_list(own, other)
+    for user_id, other_id in rows.iterator():
+        found[user_id].append(other_id)
+    return found
+
+
+def id_sets(direction, user_ids):
+    """{user_id: frozenset of ids} for FOLLOWING or FOLLOWERS, cached when shared."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    if not cache_is_shared():
+        return {user_id: frozenset(ids) for user_id, ids in _load(direction, user_ids).items()}
+    versions = _versions(user_ids)
+    keys = {user_id: f"graph:{direction}:{user_id}:{versions[user_id]}" for user_id in user_ids}
+    cached = cache.get_many(keys.values())
+    sets = {user_id: _decode(cached[key]) for user_id, key in keys.items() if key in cached}
+
+    missing = [user_id for user_id in user_ids if user_id not in sets]
+    if missing:
+        loaded = _load(direction, missing)
+        cache.set_many({keys[user_id]: _encode(ids) for user_id, ids in loaded.items()}, _timeout())
+        sets.update((user_id, frozenset(ids)) for user_id, ids in loaded.items())
+    return sets
+
+
+def following_ids(user_id):
+    return id_sets(FOLLOWING, [user_id])[user_id]
+
+
+def follower_ids(user_id):
+    return id_sets(FOLLOWERS, [user_id])[user_id]
+
+
+def is_following(user_id, target_id):
+    return target_id in following_ids(user_id)
+
+
+def following_map(user_id, target_ids):
+    """{target_id: bool} for a page of users, from one cached set."""
+    following = following_ids(user_id)
+    return {target_id: target_id in following for target_id in target_ids}
+
+
+def mutual_ids(user_id):
+    """Users who follow ``user_id`` back."""
+    return following_ids(user_id) & follower_ids(user_id)
+
+
+def suggested_ids(user_id, limit=10):
+    """
+    Users followed by the most people ``user_id`` follows, best first, not
+    counting ``user_id`` and the users they already follow.
+    """
+    following = following_ids(user_id)
+    sources = sorted(following)[:SUGGESTION_SOURCES]
+    counts = Counter()
+    for ids in id_sets(FOLLOWING, sources).values():
+        counts.update(ids)
+    for seen in following | {user_id}:
+        counts.pop(seen, None)
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [candidate for candidate, _ in ranked[:limit]]
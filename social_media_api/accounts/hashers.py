@@ -0,0 +1,94 @@
+"""
+Password hashers tuned from settings, and a bound on concurrent hashing.
+
+PASSWORD_HASHERS (see settings.py) puts PASSWORD_HASHER first. Django
+verifies a password with whichever hasher made its hash and, when that is
+not the first one or its parameters differ from the current settings,
+stores a new hash on that successful login. Changing PASSWORD_HASHER or
+the PASSWORD_SCRYPT_* / PASSWORD_ARGON2_* costs therefore upgrades every
+account as its owner next logs in.
+
+Hashing is deliberately slow and, for scrypt and argon2, memory hungry. The
+views that hash run inside hashing_slot(), which admits at most
+PASSWORD_HASHING_CONCURRENCY hashes per process at a time (threaded or
+async workers run several requests at once) and answers 503 with
+Retry-After if no slot frees up within PASSWORD_HASHING_WAIT seconds. A
+burst of logins then waits its turn instead of taking every thread, and
+the memory of every concurrent hash, from the requests that need neither.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """Django's scrypt hasher with its cost taken from settings."""
+
+    @property
+    def work_factor(self):
+        return _setting("PASSWORD_SCRYPT_WORK_FACTOR", 2**14)
+
+    @property
+    def block_size(self):
+        return _setting("PASSWORD_SCRYPT_BLOCK_SIZE", 8)
+
+    @property
+    def parallelism(self):
+        return _setting("PASSWORD_SCRYPT_PARALLELISM", 1)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Django's argon2 hasher (needs argon2-cffi) with its cost taken from settings."""
+
+    @property
+    def time_cost(self):
+        return _setting("PASSWORD_ARGON2_TIME_COST", 2)
+
+    @property
+    def memory_cost(self):
+        return _setting("PASSWORD_ARGON2_MEMORY_COST", 102400)
+
+    @property
+    def parallelism(self):
+        return _setting("PASSWORD_ARGON2_PARALLELISM", 8)
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-ins at once, try again shortly."
+    default_code = "hashing_busy"
+    wait = 1
+
+
+_slots = (0, None)
+_slots_lock = threading.Lock()
+
+
+def _semaphore():
+    global _slots
+    size = _setting("PASSWORD_HASHING_CONCURRENCY", 0) or os.cpu_count() or 1
+    with _slots_lock:
+        if _slots[0] != size:
+            _slots = (size, threading.BoundedSemaphore(size))
+        return _slots[1]
+
+
+@contextmanager
+def hashing_slot():
+    """Hold one of this process's hashing slots, or raise HashingBusy."""
+    semaphore = _semaphore()
+    if not semaphore.acquire(timeout=_setting("PASSWORD_HASHING_WAIT", 5)):
+        raise HashingBusy()
+    try:
+        yield
+    finally:
+        semaphore.release()
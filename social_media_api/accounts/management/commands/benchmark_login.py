@@ -0,0 +1,83 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+PASSWORD = "correct horse battery staple"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verifications per second on one core for each "
+        "configured hasher, then full logins per second with the preferred one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=2.0,
+                            help="Time spent on each measurement.")
+        parser.add_argument("--threads", type=int, default=os.cpu_count() or 1,
+                            help="Concurrent logins for the full-login measurement.")
+
+    def handle(self, *args, **options):
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as exc:
+                # Optional library (argon2-cffi, bcrypt) not installed
+                self.stdout.write(f"{hasher.algorithm:>20}: skipped ({exc})")
+                continue
+            count, elapsed = self.repeat(options["seconds"], lambda: hasher.verify(PASSWORD, encoded))
+            self.stdout.write(
+                f"{hasher.algorithm:>20}: {count / elapsed:8.1f} verifications/s per core "
+                f"({elapsed / count * 1000:.1f}ms each)"
+            )
+
+        try:
+            with transaction.atomic():
+                self.logins(options["seconds"], options["threads"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def logins(self, seconds, threads):
+        user = get_user_model().objects.create_user(
+            username=f"benchmark-login-{time.time_ns()}", password=PASSWORD
+        )
+        count, elapsed = self.repeat(
+            seconds, lambda: authenticate(username=user.username, password=PASSWORD)
+        )
+        self.stdout.write(f"{'login':>20}: {count / elapsed:8.1f} logins/s on one thread")
+
+        # Hashing releases the GIL, so threads show how far a process scales
+        # before PASSWORD_HASHING_CONCURRENCY or the cores run out
+        def hash_for(deadline):
+            done = 0
+            while time.perf_counter() < deadline:
+                user.check_password(PASSWORD)
+                done += 1
+            return done
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            done = sum(pool.map(hash_for, [start + seconds] * threads))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{'verify':>20}: {done / elapsed:8.1f} verifications/s on {threads} threads")
+
+    def repeat(self, seconds, call):
+        count = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while True:
+            call()
+            count += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                return count, now - start
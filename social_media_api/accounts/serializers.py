@@ -4,6 +4,13 @@ from rest_framework.authtoken.models import Token
 
 User = get_user_model()
 
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'bio', 'profile_picture', 'follower_count', 'following_count')
+        read_only_fields = ('follower_count', 'following_count')
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -33,6 +40,55 @@ class LoginSerializer(serializers.Serializer):
         raise serializers.ValidationError("Invalid username or password")
 
 
+class ProfileStatsSerializer(serializers.ModelSerializer):
+    """A profile card; users must come from accounts.stats.with_stats()."""
+    followers = serializers.IntegerField(source='follower_count')
+    following = serializers.IntegerField(source='following_count')
+    posts = serializers.IntegerField(source='post_total')
+    likes_received = serializers.IntegerField()
+    unread_notifications = serializers.IntegerField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'bio', 'profile_picture', 'followers', 'following',
+                  'posts', 'likes_received', 'unread_notifications')
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        if request is None or request.user.pk != instance.pk:
+            del data['unread_notifications']
+        return data
+
+
+MAX_BULK_FOLLOWS = 10_000
+# Largest value the user id column (a bigint) holds
+MAX_USER_ID = 2**63 - 1
+
+
+class UserRefField(serializers.Field):
+    """A user id (a number) or a username (a string)."""
+    default_error_messages = {"invalid": "Expected a user id or a username."}
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail("invalid")
+        if isinstance(data, int) and not 1 <= data <= MAX_USER_ID:
+            self.fail("invalid")
+        if isinstance(data, str) and not data.strip():
+            self.fail("invalid")
+        return data.strip() if isinstance(data, str) else data
+
+    def to_representation(self, value):
+        return value
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    users = serializers.ListField(child=UserRefField(), allow_empty=False,
+                                  max_length=MAX_BULK_FOLLOWS)
+
+
 
 
 
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import graph
+from .authentication import invalidate_user
+
+User = get_user_model()
+
+
+def invalidate_on_commit(user_id):
+    # After commit, so no request can cache the old row under the new epoch
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Logout and token regeneration delete the old token."""
+    invalidate_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    """Deactivation and profile edits; a login's last_login update changes nothing cached."""
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    invalidate_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_on_commit(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.following.through)
+def invalidate_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    """Follows change both ends' cached id sets, see accounts/graph.py."""
+    if action == "pre_clear":
+        # The cleared ids are gone by post_clear
+        related = instance.followers if reverse else instance.following
+        user_ids = [instance.pk, *related.values_list("pk", flat=True)]
+    elif action in ("post_add", "post_remove") and pk_set:
+        user_ids = [instance.pk, *pk_set]
+    else:
+        return
+    transaction.on_commit(lambda: graph.bump(*user_ids))
@@ -0,0 +1,41 @@
+"""
+Profile statistics for any number of users in one query.
+
+Follower and following counts are the counters accounts.follows keeps on
+the user row. Posts, likes received (the sum of the posts' like_count
+counters) and unread notifications are correlated subqueries, each
+answered from the index on the author or recipient column, so a page of
+profile cards costs one query whatever its size.
+
+Unread notifications are private: they are only counted on the viewer's
+own row. Other rows get 0, which ProfileStatsSerializer leaves out of the
+response.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from notifications.models import Notification
+from posts.models import Post
+
+
+def _scalar(queryset, column, aggregate):
+    return Coalesce(
+        Subquery(
+            queryset.values(column).annotate(value=aggregate).values("value"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def with_stats(users, viewer):
+    """Annotate ``users`` with post_total, likes_received and unread_notifications."""
+    posts = Post.objects.filter(author=OuterRef("pk"))
+    unread = Notification.objects.filter(
+        recipient=OuterRef("pk"), recipient_id=viewer.pk, unread=True
+    )
+    return users.annotate(
+        post_total=_scalar(posts, "author", Count("*")),
+        likes_received=_scalar(posts, "author", Sum("like_count")),
+        unread_notifications=_scalar(unread, "recipient", Count("*")),
+    )
@@ -1,3 +1,353 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from notifications.models import Notification
+from posts.models import Post
+
+from . import follows, graph, hashers
+from .authentication import CachedTokenAuthentication, invalidate_user, local_cache
+from .models import CustomUser
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowCounterTests(TestCase):
+
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(username="alice", password="pass12345")
+        self.bob = CustomUser.objects.create_user(username="bob", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def counts(self):
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        return self.alice.following_count, self.bob.follower_count
+
+    def test_follow_is_counted_once(self):
+        self.client.post(f"/accounts/follow/{self.bob.pk}/")
+        self.client.post(f"/accounts/follow/{self.bob.pk}/")
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertTrue(self.alice.following.filter(pk=self.bob.pk).exists())
+
+    def test_unfollow_decrements_only_existing_follows(self):
+        self.client.post(f"/accounts/unfollow/{self.bob.pk}/")
+        self.assertEqual(self.counts(), (0, 0))
+
+        self.client.post(f"/accounts/follow/{self.bob.pk}/")
+        self.client.post(f"/accounts/unfollow/{self.bob.pk}/")
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_profile_reads_counters(self):
+        self.client.post(f"/accounts/follow/{self.bob.pk}/")
+        self.bob.refresh_from_db()
+        self.client.force_authenticate(self.bob)
+        response = self.client.get("/accounts/profile/")
+        self.assertEqual(response.data["followers"], 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkFollowTests(TestCase):
+
+    def setUp(self):
+        self.me = CustomUser.objects.create_user(username="me")
+        self.users = [CustomUser.objects.create_user(username=f"user{i}") for i in range(4)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def post(self, url, users):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, {"users": users}, format="json")
+
+    def test_results_per_entry_and_counters(self):
+        follows.follow(self.me, self.users[1])
+        users = [self.users[0].pk, "user1", self.me.pk, "nobody", 999999]
+        response = self.post("/accounts/follow/", users)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["changed"], 1)
+        self.assertEqual([(r["user"], r["result"]) for r in response.data["results"]], [
+            (self.users[0].pk, "followed"), ("user1", "already_following"),
+            (self.me.pk, "self"), ("nobody", "not_found"), (999999, "not_found"),
+        ])
+        self.me.refresh_from_db()
+        self.users[0].refresh_from_db()
+        self.assertEqual((self.me.following_count, self.users[0].follower_count), (2, 1))
+        self.assertEqual(graph.following_ids(self.me.pk), {self.users[0].pk, self.users[1].pk})
+
+        response = self.post("/accounts/unfollow/", ["user0", "user2", "user1"])
+        self.assertEqual([r["result"] for r in response.data["results"]],
+                         ["unfollowed", "not_following", "unfollowed"])
+        self.me.refresh_from_db()
+        self.assertEqual(self.me.following_count, 0)
+        self.assertEqual(graph.following_ids(self.me.pk), set())
+
+    def test_queries_do_not_grow_with_the_list(self):
+        def queries(users):
+            with CaptureQueriesContext(connection) as context:
+                self.post("/accounts/follow/", users)
+            return len(context.captured_queries)
+
+        few = queries(["user0", "user1"])
+        many = [CustomUser(username=f"bulk{i}") for i in range(300)]
+        CustomUser.objects.bulk_create(many)
+        self.assertEqual(queries([f"bulk{i}" for i in range(300)] + ["user2"]), few)
+        self.me.refresh_from_db()
+        self.assertEqual(self.me.following_count, 303)
+
+    def test_invalid_entries(self):
+        for users in ([], [True], [0], [2**63], [""], [{"id": 1}], "user0"):
+            self.assertEqual(self.post("/accounts/follow/", users).status_code, 400, users)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, PASSWORD_SCRYPT_WORK_FACTOR=2**10)
+class AuthPipelineTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self, password="pass12345"):
+        return self.client.post("/accounts/login/", {"username": "dave", "password": password})
+
+    def test_signup_issues_one_token(self):
+        response = self.client.post("/accounts/register/", {
+            "username": "dave", "email": "dave@example.com", "password": "pass12345",
+        })
+        self.assertEqual(list(Token.objects.values_list("key", flat=True)), [response.data["token"]])
+        self.assertEqual(self.login().data["token"], response.data["token"])
+
+    def test_login_upgrades_old_hashes(self):
+        user = CustomUser.objects.create_user(username="dave")
+        user.password = make_password("pass12345", hasher="pbkdf2_sha256")
+        user.save()
+
+        self.assertEqual(self.login("wrong").status_code, 400)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+
+        self.assertEqual(self.login().status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$"))
+        self.assertEqual(user.password.split("$")[1], "1024")
+
+        with self.settings(PASSWORD_SCRYPT_WORK_FACTOR=2**11):
+            self.login()
+        user.refresh_from_db()
+        self.assertEqual(user.password.split("$")[1], "2048")
+
+    @override_settings(PASSWORD_HASHING_CONCURRENCY=1, PASSWORD_HASHING_WAIT=0)
+    def test_busy_hashing_answers_503(self):
+        CustomUser.objects.create_user(username="dave", password="pass12345")
+        with hashers.hashing_slot():
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(self.login().status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProfileStatsTests(TestCase):
+
+    def setUp(self):
+        self.me = CustomUser.objects.create_user(username="me")
+        self.other = CustomUser.objects.create_user(username="other")
+        self.quiet = CustomUser.objects.create_user(username="quiet")
+        follows.follow(self.other, self.me)
+        follows.follow(self.me, self.quiet)
+        Post.objects.create(author=self.me, title="a", content="...", like_count=3)
+        Post.objects.create(author=self.me, title="b", content="...", like_count=4)
+        Post.objects.create(author=self.other, title="c", content="...", like_count=1)
+        Notification.objects.create(recipient=self.me, actor=self.other, verb="liked")
+        Notification.objects.create(recipient=self.me, actor=self.other, verb="liked", unread=False)
+        Notification.objects.create(recipient=self.other, actor=self.me, verb="liked")
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def test_own_stats(self):
+        expected = {"followers": 1, "following": 1, "posts": 2, "likes_received": 7,
+                    "unread_notifications": 1}
+        with self.assertNumQueries(1):
+            response = self.client.get("/accounts/stats/")
+        self.assertEqual({key: response.data[key] for key in expected}, expected)
+
+        response = self.client.get("/accounts/profile/")
+        self.assertEqual({key: response.data[key] for key in expected}, expected)
+
+    def test_batch_cards_in_one_query(self):
+        ids = [self.quiet.pk, 999999, self.other.pk, self.me.pk]
+        with self.assertNumQueries(1):
+            response = self.client.get("/accounts/stats/", {"users": ",".join(map(str, ids))})
+        cards = response.data["results"]
+        self.assertEqual([card["username"] for card in cards], ["quiet", "other", "me"])
+        self.assertEqual([(card["posts"], card["likes_received"]) for card in cards],
+                         [(0, 0), (1, 1), (2, 7)])
+        self.assertEqual(["unread_notifications" in card for card in cards], [False, False, True])
+        for users in ("me", str(2**63)):
+            self.assertEqual(self.client.get("/accounts/stats/", {"users": users}).status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHE_SHARED=True)
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.client = APIClient()
+        response = self.client.post("/accounts/register/", {
+            "username": "carol", "email": "carol@example.com", "password": "pass12345",
+        })
+        self.token = response.data["token"]
+        self.user = CustomUser.objects.get(username="carol")
+
+    def profile(self, token=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token or self.token}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/accounts/profile/")
+        token_queries = [q for q in queries.captured_queries if "authtoken_token" in q["sql"]]
+        return response, len(token_queries)
+
+    def test_repeat_requests_skip_the_token_query(self):
+        response, lookups = self.profile()
+        self.assertEqual((response.status_code, lookups), (200, 1))
+        response, lookups = self.profile()
+        self.assertEqual((response.status_code, lookups), (200, 0))
+        self.assertEqual(response.data["username"], "carol")
+
+    def test_login_returns_the_same_working_token(self):
+        response = self.client.post("/accounts/login/", {"username": "carol", "password": "pass12345"})
+        self.assertEqual(response.data["token"], self.token)
+        self.assertEqual(self.profile()[0].status_code, 200)
+
+    def test_counters_are_never_cached(self):
+        self.profile()
+        CustomUser.objects.filter(pk=self.user.pk).update(follower_count=7)
+        self.assertEqual(self.profile()[0].data["followers"], 7)
+
+    def test_deleted_and_regenerated_tokens_stop_working(self):
+        self.profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.filter(key=self.token).delete()
+            new = Token.objects.create(user=self.user)
+        self.assertEqual(self.profile()[0].status_code, 401)
+        self.assertEqual(self.profile(new.key)[0].status_code, 200)
+
+    def test_deactivation_is_immediate(self):
+        self.profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.profile()[0].status_code, 401)
+
+    def test_change_committing_during_a_load_is_not_cached_as_current(self):
+        load_user = CachedTokenAuthentication.load_user
+
+        def load_then_deactivate(auth, user_id):
+            user = load_user(auth, user_id)
+            # Another request deactivates the user and commits right after
+            # this one read the still-active row
+            CustomUser.objects.filter(pk=user_id).update(is_active=False)
+            invalidate_user(user_id)
+            return user
+
+        with mock.patch.object(CachedTokenAuthentication, "load_user", load_then_deactivate):
+            self.assertEqual(self.profile()[0].status_code, 200)
+        self.assertEqual(self.profile()[0].status_code, 401)
+
+    def test_invalidation_reaches_other_processes(self):
+        self.profile()
+        # Another worker's LRU still holds the user; the shared epoch voids it
+        other_worker = dict(local_cache._entries)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        local_cache._entries.update(other_worker)
+        self.assertEqual(self.profile()[0].status_code, 401)
+
+    @override_settings(CACHE_SHARED=None)
+    def test_per_process_cache_is_not_used(self):
+        # The test cache is local memory: another worker would never see
+        # this worker's epoch bumps, so every request reads the token
+        for _ in range(2):
+            response, lookups = self.profile()
+            self.assertEqual((response.status_code, lookups), (200, 1))
+        self.assertEqual(len(local_cache), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.profile()[0].status_code, 401)
+
+    @override_settings(TOKEN_AUTH_LOCAL_SIZE=2)
+    def test_local_tier_is_bounded(self):
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f"user{i}")
+            self.profile(Token.objects.create(user=user).key)
+        self.assertEqual(len(local_cache), 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHE_SHARED=True)
+class FollowGraphTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.users = [CustomUser.objects.create_user(username=f"user{i}") for i in range(6)]
+        self.me = self.users[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            for a, b in [(0, 1), (0, 2), (1, 0), (1, 3), (2, 3), (2, 4), (1, 4), (0, 5)]:
+                follows.follow(self.users[a], self.users[b])
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def ids(self, *indexes):
+        return {self.users[i].pk for i in indexes}
+
+    def test_sets_are_cached_and_follow_changes(self):
+        self.assertEqual(graph.following_ids(self.me.pk), self.ids(1, 2, 5))
+        self.assertEqual(graph.follower_ids(self.me.pk), self.ids(1))
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_following(self.me.pk, self.users[1].pk))
+            self.assertEqual(graph.follower_ids(self.me.pk), self.ids(1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            follows.unfollow(self.me, self.users[1])
+            self.users[3].following.add(self.me)
+        self.assertFalse(graph.is_following(self.me.pk, self.users[1].pk))
+        self.assertEqual(graph.follower_ids(self.me.pk), self.ids(1, 3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.me.followers.clear()
+        self.assertEqual(graph.follower_ids(self.me.pk), set())
+        self.assertNotIn(self.me.pk, graph.following_ids(self.users[3].pk))
+
+    def test_batched_lookup_for_a_page_of_authors(self):
+        graph.following_ids(self.me.pk)
+        ids = ",".join(str(pk) for pk in sorted(self.ids(1, 3, 5)))
+        with self.assertNumQueries(0):
+            response = self.client.get("/accounts/following/", {"ids": ids})
+        self.assertEqual(response.data["following"], {
+            self.users[1].pk: True, self.users[3].pk: False, self.users[5].pk: True,
+        })
+        self.assertEqual(self.client.get("/accounts/following/", {"ids": "x"}).status_code, 400)
+
+    def test_mutuals_and_suggestions(self):
+        self.assertEqual(graph.mutual_ids(self.me.pk), self.ids(1))
+        response = self.client.get("/accounts/mutuals/")
+        self.assertEqual([user["id"] for user in response.data["results"]], [self.users[1].pk])
+
+        # user3 and user4 are each followed by two of the people I follow
+        self.assertEqual(graph.suggested_ids(self.me.pk), sorted(self.ids(3, 4)))
+        response = self.client.get("/accounts/suggestions/", {"limit": 1})
+        self.assertEqual([user["username"] for user in response.data], ["user3"])
+
+    @override_settings(CACHE_SHARED=None)
+    def test_per_process_cache_is_not_used(self):
+        # Another worker's local-memory copy would miss this unfollow
+        graph.following_ids(self.me.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(graph.is_following(self.me.pk, self.users[1].pk))
+        follows.unfollow(self.me, self.users[1])
+        self.assertFalse(graph.is_following(self.me.pk, self.users[1].pk))
@@ -1,11 +1,19 @@
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView
-from .views import FollowUserView, UnfollowUserView
+from social_media_api.asyncviews import read_view
+from .views import RegisterView, LoginView, ProfileView, ProfileStatsView, AsyncProfileView
+from .views import FollowUserView, UnfollowUserView, BulkFollowView, BulkUnfollowView
+from .views import FollowStatusView, MutualFollowsView, SuggestedFollowsView
 
 urlpatterns = [
     path('register/', RegisterView.as_view()),
     path('login/', LoginView.as_view()),
-    path('profile/', ProfileView.as_view()),
+    path('profile/', read_view(ProfileView.as_view(), AsyncProfileView.as_view())),
+    path('stats/', ProfileStatsView.as_view(), name='profile-stats'),
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('follow/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
+    path('following/', FollowStatusView.as_view(), name='follow-status'),
+    path('mutuals/', MutualFollowsView.as_view(), name='mutual-follows'),
+    path('suggestions/', SuggestedFollowsView.as_view(), name='suggested-follows'),
 ]
@@ -1,11 +1,21 @@
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
-from rest_framework import generics, permissions
+from rest_framework import generics, permissions, serializers
 from rest_framework.views import APIView
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
-from .serializers import RegisterSerializer, LoginSerializer
+from social_media_api.asyncviews import AsyncAPIViewMixin
+
+from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
+from .serializers import BulkFollowSerializer, ProfileStatsSerializer, MAX_USER_ID
 from .models import CustomUser
+from . import follows, graph, hashers
+from .stats import with_stats
+
+MAX_STATUS_IDS = 100
+MAX_SUGGESTIONS = 50
+MAX_PROFILE_CARDS = 100
 
 
 class FollowUserView(generics.GenericAPIView):
@@ -18,7 +28,7 @@ class FollowUserView(generics.GenericAPIView):
         if target_user == request.user:
             return Response({"detail": "You cannot follow yourself."}, status=400)
 
-        request.user.following.add(target_user)
+        follows.follow(request.user, target_user)
         return Response({"detail": f"You are now following {target_user.username}."})
 
 
@@ -32,10 +42,68 @@ class UnfollowUserView(generics.GenericAPIView):
         if target_user == request.user:
             return Response({"detail": "You cannot unfollow yourself."}, status=400)
 
-        request.user.following.remove(target_user)
+        follows.unfollow(request.user, target_user)
         return Response({"detail": f"You have unfollowed {target_user.username}."})
 
 
+class BulkFollowView(generics.GenericAPIView):
+    """
+    Follow up to 10,000 users at once, given by id or username:
+    ``{"users": [12, "alice", ...]}``. Answers with one result per entry,
+    in order: followed, already_following, not_found or self.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BulkFollowSerializer
+    change = staticmethod(follows.follow_many)
+    changed_status = "followed"
+    unchanged_status = "already_following"
+
+    def resolve(self, refs):
+        """Ids for ``refs`` (None where no such user), with one query."""
+        ids = {ref for ref in refs if isinstance(ref, int)}
+        names = {ref for ref in refs if isinstance(ref, str)}
+        found = list(
+            CustomUser.objects.filter(Q(pk__in=ids) | Q(username__in=names))
+            .values_list("pk", "username")
+        )
+        known_ids = {pk for pk, _ in found}
+        by_name = {username: pk for pk, username in found}
+        return [
+            (ref if ref in known_ids else None) if isinstance(ref, int) else by_name.get(ref)
+            for ref in refs
+        ]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refs = serializer.validated_data["users"]
+        ids = self.resolve(refs)
+        changed = self.change(request.user, {pk for pk in ids if pk is not None})
+
+        results = []
+        for ref, pk in zip(refs, ids):
+            if pk is None:
+                result = "not_found"
+            elif pk == request.user.pk:
+                result = "self"
+            elif pk in changed:
+                result = self.changed_status
+            else:
+                result = self.unchanged_status
+            results.append({"user": ref, "id": pk, "result": result})
+        return Response({"changed": len(changed), "results": results})
+
+
+class BulkUnfollowView(BulkFollowView):
+    """
+    Unfollow up to 10,000 users at once; the results are unfollowed,
+    not_following, not_found or self.
+    """
+    change = staticmethod(follows.unfollow_many)
+    changed_status = "unfollowed"
+    unchanged_status = "not_following"
+
+
 class RegisterView(APIView):
     """
     Register a new user and return their token.
@@ -43,9 +111,10 @@ class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
-            return Response({"token": token.key})
+            with hashers.hashing_slot():
+                user = serializer.save()
+            # RegisterSerializer.create() issued the token
+            return Response({"token": user.auth_token.key})
         return Response(serializer.errors, status=400)
 
 
@@ -55,7 +124,9 @@ class LoginView(APIView):
     """
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
+        with hashers.hashing_slot():
+            valid = serializer.is_valid()
+        if valid:
             user = serializer.validated_data
             token, created = Token.objects.get_or_create(user=user)
             return Response({"token": token.key})
@@ -68,12 +139,98 @@ class ProfileView(APIView):
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        # Counters and stats in one query; users from accounts.authentication
+        # have their counters deferred anyway
+        return with_stats(CustomUser.objects.filter(pk=self.request.user.pk), self.request.user)
+
     def get(self, request):
-        user = request.user
-        data = {
+        return Response(self.profile(self.get_queryset().get()))
+
+    def profile(self, user):
+        return {
             "username": user.username,
             "email": user.email,
             "bio": getattr(user, "bio", ""),
-            "followers": user.followers.count()
+            "followers": user.follower_count,
+            "following": user.following_count,
+            "posts": user.post_total,
+            "likes_received": user.likes_received,
+            "unread_notifications": user.unread_notifications,
         }
-        return Response(data)
+
+
+class AsyncProfileView(AsyncAPIViewMixin, ProfileView):
+    """ProfileView on the async ORM, routed with ASYNC_VIEWS."""
+
+    async def get(self, request):
+        return Response(self.profile(await self.get_queryset().aget()))
+
+
+class ProfileStatsView(APIView):
+    """
+    Profile card of the current user, or with ``?users=1,2,3`` the cards of
+    up to 100 users in that order (unknown ids are left out), in one query.
+    Unread notifications are only shown on the viewer's own card.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        raw = request.query_params.get("users")
+        context = {"request": request}
+        if raw is None:
+            user = with_stats(CustomUser.objects.filter(pk=request.user.pk), request.user).get()
+            return Response(ProfileStatsSerializer(user, context=context).data)
+
+        field = serializers.ListField(
+            child=serializers.IntegerField(min_value=1, max_value=MAX_USER_ID),
+            max_length=MAX_PROFILE_CARDS,
+        )
+        ids = field.run_validation([part for part in raw.split(",") if part.strip()])
+        users = with_stats(CustomUser.objects.filter(pk__in=ids), request.user).in_bulk()
+        cards = [users[pk] for pk in dict.fromkeys(ids) if pk in users]
+        return Response({"results": ProfileStatsSerializer(cards, many=True, context=context).data})
+
+
+class FollowStatusView(APIView):
+    """
+    Whether the current user follows each of ``?ids=1,2,3`` (e.g. the
+    authors on a page), answered from the cached follow graph.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        field = serializers.ListField(
+            child=serializers.IntegerField(min_value=1), max_length=MAX_STATUS_IDS
+        )
+        raw = request.query_params.get("ids", "")
+        ids = field.run_validation([part for part in raw.split(",") if part.strip()])
+        return Response({"following": graph.following_map(request.user.pk, ids)})
+
+
+class MutualFollowsView(generics.ListAPIView):
+    """
+    Users the current user follows who follow them back.
+    """
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ("-id",)
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(pk__in=graph.mutual_ids(self.request.user.pk))
+
+
+class SuggestedFollowsView(APIView):
+    """
+    Users followed by the most people the current user follows,
+    ``?limit=`` of them (default 10).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        field = serializers.IntegerField(min_value=1, max_value=MAX_SUGGESTIONS)
+        limit = field.run_validation(request.query_params.get("limit", 10))
+        ids = graph.suggested_ids(request.user.pk, limit)
+        users = CustomUser.objects.in_bulk(ids)
+        ranked = [users[pk] for pk in ids if pk in users]
+        return Response(UserSerializer(ranked, many=True).data)
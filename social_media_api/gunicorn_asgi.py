@@ -0,0 +1,22 @@
+"""
+Gunicorn settings for the ASGI deployment: uvicorn workers serving
+social_media_api.asgi, with the async read views switched on.
+
+    gunicorn -c gunicorn_asgi.py social_media_api.asgi
+
+Every worker is one process running an event loop, so it keeps many
+connections open while their queries run instead of one request per sync
+worker. WEB_CONCURRENCY sets the number of processes (one per CPU by
+default). Compare it with the sync profile in the Procfile using
+`manage.py benchmark_concurrency`.
+"""
+import multiprocessing
+import os
+
+# Read by the URLconfs when the workers load the application
+os.environ.setdefault("ASYNC_VIEWS", "1")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = 5
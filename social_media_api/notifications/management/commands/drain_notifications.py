@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications import services
+
+
+class Command(BaseCommand):
+    help = "Deliver queued notifications, coalescing bursts into single rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep draining; run this as the worker process.")
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty (--loop).")
+
+    def handle(self, *args, **options):
+        if not options["loop"]:
+            drained = services.drain_all(options["batch_size"])
+            self.stdout.write(f"Delivered {drained} events.")
+            return
+
+        self.stdout.write("Draining notification outbox, Ctrl+C to stop.")
+        try:
+            while True:
+                close_old_connections()
+                if not services.drain(options["batch_size"]):
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
@@ -7,9 +7,11 @@ class Notification(models.Model):
     recipient = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications"
     )
+    # Most recent actor; actor_count says how many acted in the coalescing window
     actor = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="actions"
     )
+    actor_count = models.PositiveIntegerField(default=1)
     verb = models.CharField(max_length=255)
     target_ct = models.ForeignKey(ContentType, blank=True, null=True, on_delete=models.CASCADE)
     target_id = models.PositiveIntegerField(blank=True, null=True)
@@ -19,8 +21,58 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            # Notification list, optionally filtered to unread
+            models.Index(fields=["recipient", "unread", "-timestamp"], name="notification_inbox_idx"),
+            # Unread badge COUNT only touches unread rows
+            models.Index(
+                fields=["recipient"], condition=models.Q(unread=True),
+                name="notification_unread_idx",
+            ),
+            # Finds the open notification a new event coalesces into
+            models.Index(
+                fields=["recipient", "verb", "target_ct", "target_id", "-timestamp"],
+                name="notification_coalesce_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.actor} {self.verb} -> {self.recipient}"
 
-# Create your models here.
+
+class NotificationActor(models.Model):
+    """
+    One distinct actor counted in a notification's actor_count, so a user
+    acting twice in the coalescing window is only counted once.
+    """
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name="actors")
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["notification", "actor"], name="notification_actor_uniq"),
+        ]
+
+
+class NotificationEvent(models.Model):
+    """
+    Outbox row for a notification that has not been delivered yet.
+
+    Written in the same transaction as the action that caused it and turned
+    into (possibly coalesced) Notification rows by drain_notifications.
+    """
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    verb = models.CharField(max_length=255)
+    target_ct = models.ForeignKey(ContentType, blank=True, null=True, on_delete=models.CASCADE)
+    target_id = models.PositiveIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.actor_id} {self.verb} -> {self.recipient_id} (pending)"
@@ -4,10 +4,24 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     actor_username = serializers.CharField(source="actor.username", read_only=True)
     target_str = serializers.SerializerMethodField()
+    summary = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
-        fields = ["id", "actor_username", "verb", "target_str", "unread", "timestamp"]
+        fields = [
+            "id", "actor_username", "actor_count", "verb", "target_str", "summary",
+            "unread", "timestamp",
+        ]
+
+    def get_summary(self, obj):
+        # "alice liked your post" / "alice and 37 others liked your post"
+        others = obj.actor_count - 1
+        if others <= 0:
+            return f"{obj.actor.username} {obj.verb}"
+        noun = "other" if others == 1 else "others"
+        return f"{obj.actor.username} and {others} {noun} {obj.verb}"
 
     def get_target_str(self, obj):
-        return str(obj.target) if obj.target else None
+        # obj.target is prefetched by NotificationListView; no query per row
+        target = obj.target
+        return str(target) if target is not None else None
@@ -0,0 +1,189 @@
+"""
+Notification outbox.
+
+notify() only appends a NotificationEvent row, so the request that caused it
+pays for one small insert inside its own transaction. drain() - run by the
+drain_notifications command - turns pending events into Notification rows in
+batches and coalesces bursts: events for the same (recipient, verb, target)
+within NOTIFICATION_COALESCE_WINDOW seconds become one notification with an
+actor_count ("alice and 37 others liked your post"). The actors counted are
+kept as NotificationActor rows, so a user who acts again is not counted twice.
+
+No broker is needed; on PostgreSQL several drainers can run side by side
+because events are claimed with SELECT ... FOR UPDATE SKIP LOCKED.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+from .models import Notification, NotificationActor, NotificationEvent
+
+
+def coalesce_window():
+    return timedelta(seconds=getattr(settings, "NOTIFICATION_COALESCE_WINDOW", 3600))
+
+
+def notify(recipient, actor, verb, target=None):
+    """Queue a notification for delivery by drain()."""
+    if target is not None:
+        return notify_ids(
+            recipient.pk, actor.pk, verb,
+            ContentType.objects.get_for_model(target).pk, target.pk,
+        )
+    return notify_ids(recipient.pk, actor.pk, verb)
+
+
+def notify_ids(recipient_id, actor_id, verb, target_ct_id=None, target_id=None):
+    """notify() for callers that only hold ids."""
+    if recipient_id == actor_id:
+        return None
+    return NotificationEvent.objects.create(
+        recipient_id=recipient_id, actor_id=actor_id, verb=verb,
+        target_ct_id=target_ct_id, target_id=target_id,
+    )
+
+
+def _key(row):
+    return (row.recipient_id, row.verb, row.target_ct_id, row.target_id)
+
+
+def drain(batch_size=500):
+    """
+    Deliver up to ``batch_size`` pending events.
+
+    Returns the number of events consumed.
+    """
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        groups = {}
+        for event in events:
+            groups.setdefault(_key(event), []).append(event)
+
+        # Open notifications the new events can be folded into, one query
+        cutoff = timezone.now() - coalesce_window()
+        open_notifications = {}
+        candidates = Notification.objects.filter(
+            unread=True,
+            timestamp__gte=cutoff,
+            recipient_id__in={key[0] for key in groups},
+            verb__in={key[1] for key in groups},
+        ).order_by("timestamp")
+        for notification in candidates:
+            open_notifications[_key(notification)] = notification
+
+        # Actors the reused notifications already count, one query
+        reused = [open_notifications[key] for key in groups if key in open_notifications]
+        counted = set(
+            NotificationActor.objects.filter(
+                notification__in=reused, actor_id__in={event.actor_id for event in events}
+            ).values_list("notification_id", "actor_id")
+        ) if reused else set()
+
+        created, updated, new_actors = [], [], []
+        now = timezone.now()
+        for key, group in groups.items():
+            latest = group[-1]
+            actor_ids = list(dict.fromkeys(event.actor_id for event in group))
+            notification = open_notifications.get(key)
+            if notification is not None:
+                actor_ids = [
+                    actor_id for actor_id in actor_ids
+                    if (notification.pk, actor_id) not in counted
+                ]
+                notification.actor_id = latest.actor_id
+                notification.actor_count += len(actor_ids)
+                notification.timestamp = now
+                updated.append(notification)
+            else:
+                notification = Notification(
+                    recipient_id=latest.recipient_id, actor_id=latest.actor_id,
+                    actor_count=len(actor_ids), verb=latest.verb,
+                    target_ct_id=latest.target_ct_id, target_id=latest.target_id,
+                )
+                created.append(notification)
+            new_actors.append((notification, actor_ids))
+
+        Notification.objects.bulk_create(created)
+        Notification.objects.bulk_update(updated, ["actor", "actor_count", "timestamp"])
+        NotificationActor.objects.bulk_create(
+            [NotificationActor(notification=notification, actor_id=actor_id)
+             for notification, actor_ids in new_actors for actor_id in actor_ids],
+            ignore_conflicts=True,
+        )
+        NotificationEvent.objects.filter(id__in=[event.id for event in events]).delete()
+        recipients = {notification.recipient_id for notification in created}
+        transaction.on_commit(lambda: forget_unread_counts(recipients))
+    return len(events)
+
+
+def drain_all(batch_size=500):
+    """Drain until the outbox is empty; returns the number of events consumed."""
+    total = 0
+    while True:
+        drained = drain(batch_size)
+        if not drained:
+            return total
+        total += drained
+
+
+# Unread badge
+# ---------------------------------------------------------
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user):
+    """
+    Number of unread notifications, served from the cache.
+
+    A miss is one COUNT over the partial (recipient) WHERE unread index; the
+    value is dropped whenever the count can change, and expires after
+    NOTIFICATION_UNREAD_CACHE_TIMEOUT seconds in any case.
+    """
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user, unread=True).count()
+        cache.set(key, count, getattr(settings, "NOTIFICATION_UNREAD_CACHE_TIMEOUT", 60))
+    return count
+
+
+def forget_unread_counts(user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+
+
+def mark_all_read(user):
+    """Mark every unread notification read in one UPDATE; returns the row count."""
+    marked = Notification.objects.filter(recipient=user, unread=True).update(unread=False)
+    if marked:
+        forget_unread_counts([user.pk])
+    return marked
+
+
+def mark_read_up_to(user, notification_id):
+    """
+    Mark read everything at or before ``notification_id`` in list order
+    (newest first), in one UPDATE; returns the row count.
+    """
+    timestamp = Subquery(
+        Notification.objects.filter(pk=notification_id, recipient=user).values("timestamp")
+    )
+    # Rows sharing the timestamp are ordered by id, as the list breaks ties
+    marked = Notification.objects.filter(
+        Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lte=notification_id),
+        recipient=user, unread=True,
+    ).update(unread=False)
+    if marked:
+        forget_unread_counts([user.pk])
+    return marked
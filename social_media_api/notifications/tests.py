@@ -1,3 +1,154 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from posts.models import Post
+from social_media_api.testing import QueryBudgetMixin
+from . import services
+from .models import Notification, NotificationEvent
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationPipelineTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fans = [User.objects.create_user(username=f"fan{i}") for i in range(4)]
+        self.post = Post.objects.create(author=self.author, title="Hi", content="...")
+
+    def test_notify_only_queues(self):
+        services.notify(self.author, self.fans[0], "liked your post", self.post)
+        self.assertEqual(NotificationEvent.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_self_actions_are_not_queued(self):
+        services.notify(self.author, self.author, "liked your post", self.post)
+        self.assertFalse(NotificationEvent.objects.exists())
+
+    def test_burst_is_coalesced_into_one_notification(self):
+        for fan in self.fans:
+            services.notify(self.author, fan, "liked your post", self.post)
+        self.assertEqual(services.drain_all(batch_size=2), 4)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor, self.fans[-1])
+        self.assertEqual(notification.actor_count, 4)
+        self.assertFalse(NotificationEvent.objects.exists())
+
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.get("/notifications/")
+        self.assertEqual(
+            response.data["results"][0]["summary"], "fan3 and 3 others liked your post"
+        )
+
+    def test_repeat_actors_are_counted_once(self):
+        for fan in (self.fans[0], self.fans[1], self.fans[0]):
+            services.notify(self.author, fan, "liked your post", self.post)
+        services.drain_all(batch_size=1)
+        for fan in (self.fans[1], self.fans[2]):
+            services.notify(self.author, fan, "liked your post", self.post)
+        services.drain_all()
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor, self.fans[2])
+
+    def test_notifications_outside_the_window_are_not_reused(self):
+        services.notify(self.author, self.fans[0], "liked your post", self.post)
+        services.drain_all()
+        Notification.objects.update(timestamp=self.post.created_at - timedelta(days=1))
+
+        services.notify(self.author, self.fans[1], "liked your post", self.post)
+        services.drain_all()
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnreadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="pass12345")
+        self.actor = User.objects.create_user(username="actor", password="pass12345")
+        self.notifications = [
+            Notification.objects.create(recipient=self.user, actor=self.actor, verb=f"poked you {i}")
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_badge_is_served_from_cache(self):
+        self.assertEqual(self.client.get("/notifications/unread-count/").data, {"unread": 3})
+        with self.assertNumQueries(0):
+            self.assertEqual(services.unread_count(self.user), 3)
+
+    def test_drain_invalidates_badge(self):
+        self.assertEqual(services.unread_count(self.user), 3)
+        services.notify(self.user, self.actor, "followed you")
+        with self.captureOnCommitCallbacks(execute=True):
+            services.drain_all()
+        self.assertEqual(services.unread_count(self.user), 4)
+
+    def test_mark_all_read(self):
+        services.unread_count(self.user)
+        with self.assertNumQueries(1):
+            marked = services.mark_all_read(self.user)
+        self.assertEqual(marked, 3)
+        self.assertEqual(self.client.get("/notifications/unread-count/").data, {"unread": 0})
+
+    def test_mark_read_up_to(self):
+        Notification.objects.filter(pk=self.notifications[0].pk).update(
+            timestamp=self.notifications[0].timestamp - timedelta(minutes=5)
+        )
+        response = self.client.post("/notifications/mark-read/", {"up_to": self.notifications[0].pk})
+        self.assertEqual(response.data, {"marked": 1})
+
+        unread = self.client.get("/notifications/", {"unread": "true"}).data["results"]
+        self.assertEqual(len(unread), 2)
+
+    def test_mark_read_up_to_breaks_timestamp_ties_by_id(self):
+        Notification.objects.update(timestamp=self.notifications[0].timestamp)
+        self.assertEqual(services.mark_read_up_to(self.user, self.notifications[1].pk), 2)
+        unread = Notification.objects.filter(unread=True).values_list("pk", flat=True)
+        self.assertEqual(list(unread), [self.notifications[2].pk])
+
+    def test_mark_read_requires_an_id(self):
+        self.assertEqual(self.client.post("/notifications/mark-read/", {}).status_code, 400)
+
+    def test_polling_gets_304_until_something_changes(self):
+        etag = self.client.get("/notifications/")["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get("/notifications/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        services.mark_read_up_to(self.user, self.notifications[1].pk)
+        response = self.client.get("/notifications/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListQueryTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="pass12345")
+        for i in range(10):
+            actor = User.objects.create_user(username=f"actor{i}")
+            post = Post.objects.create(author=self.user, title=f"Post {i}", content="...")
+            services.notify(self.user, actor, "liked your post", post)
+        services.drain_all()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_targets_are_resolved_in_bulk(self):
+        queries = self.assertQueryCountFlat("/notifications/")
+        # Notifications + actors, then posts
+        self.assertEqual(queries, 2)
+
+        response = self.client.get("/notifications/", {"page_size": 1})
+        self.assertEqual(response.data["results"][0]["target_str"], "Post 9")
@@ -1,6 +1,12 @@
 from django.urls import path
-from .views import NotificationListView
+from social_media_api.asyncviews import read_view
+from .views import NotificationListView, UnreadCountView, MarkAllReadView, MarkReadView
+from .views import AsyncNotificationListView
 
 urlpatterns = [
-    path('', NotificationListView.as_view(), name='notifications-list'),
+    path('', read_view(NotificationListView.as_view(), AsyncNotificationListView.as_view()),
+         name='notifications-list'),
+    path('unread-count/', UnreadCountView.as_view(), name='notifications-unread-count'),
+    path('mark-all-read/', MarkAllReadView.as_view(), name='notifications-mark-all-read'),
+    path('mark-read/', MarkReadView.as_view(), name='notifications-mark-read'),
 ]
@@ -1,12 +1,78 @@
-from rest_framework import generics, permissions
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from rest_framework import generics, permissions, serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from posts.models import Post
+from social_media_api.asyncviews import AsyncListMixin
+from social_media_api.conditional import ConditionalGetMixin
+from social_media_api.query_planner import PlannedQuerysetMixin
 from .models import Notification
 from .serializers import NotificationSerializer
+from . import services
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(ConditionalGetMixin, PlannedQuerysetMixin, generics.ListAPIView):
+    """
+    The user's notifications, newest first.
+
+    Actors are joined in and targets are resolved in bulk: one query per
+    target content type for the whole page, with content types coming from
+    Django's process-wide ContentType cache.
+
+    Polls with a current ETag get a 304: coalescing moves the timestamp and
+    actor_count, marking read moves the unread count.
+    """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ("-timestamp", "-id")
+    updated_field = "timestamp"
+
+    def get_row_validators(self, notification):
+        return (
+            *super().get_row_validators(notification),
+            notification.unread, notification.actor_id, notification.actor_count,
+        )
 
     def get_queryset(self):
-        return self.request.user.notifications.all()
+        notifications = self.request.user.notifications.all()
+        if self.request.query_params.get("unread") in ("1", "true", "True"):
+            notifications = notifications.filter(unread=True)
+        return self.plan(notifications).prefetch_related(
+            GenericPrefetch("target", [Post.objects.only("id", "title")])
+        )
+
+
+class AsyncNotificationListView(AsyncListMixin, NotificationListView):
+    """NotificationListView on the async ORM, routed with ASYNC_VIEWS."""
+    etag_namespace = "NotificationListView"
+
+
+class UnreadCountView(APIView):
+    """
+    Unread badge count, answered from the cache; safe to poll.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": services.unread_count(request.user)})
+
+
+class MarkAllReadView(APIView):
+    """
+    Mark every notification read.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({"marked": services.mark_all_read(request.user)})
+
+
+class MarkReadView(APIView):
+    """
+    Mark read the notification ``up_to`` and everything older than it.
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
-# Create your views here.
+    def post(self, request):
+        field = serializers.IntegerField(min_value=1)
+        up_to = field.run_validation(request.data.get("up_to"))
+        return Response({"marked": services.mark_read_up_to(request.user, up_to)})
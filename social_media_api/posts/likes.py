@@ -0,0 +1,163 @@
+"""
+Idempotent like/unlike.
+
+A like is an ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` and an unlike a
+``DELETE ... RETURNING``: whether a row came back tells us, from that one
+statement, if the state changed. Only then is like_count moved and the
+author notified, all inside one transaction. On PostgreSQL the write and the
+counter update are a single statement (a data-modifying CTE). The
+notification is queued in the outbox (notifications/services.py) rather
+than written directly.
+
+Racing double taps therefore never raise IntegrityError and never count
+twice. On backends without ON CONFLICT/RETURNING, LikePostView likes with
+the ORM instead (get_or_create, then record_like()) and unlike_post() falls
+back to a plain delete.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications import services as notifications
+from .models import Like, Post
+
+
+def supports_returning():
+    """Whether like_post()/unlike_post() can use the single-statement writes."""
+    return connection.vendor in ("postgresql", "sqlite") and (
+        connection.features.can_return_columns_from_insert
+    )
+
+
+def _names():
+    qn = connection.ops.quote_name
+    return {
+        "like": qn(Like._meta.db_table),
+        "post": qn(Post._meta.db_table),
+        "like_user": qn(Like._meta.get_field("user").column),
+        "like_post": qn(Like._meta.get_field("post").column),
+        "like_created": qn(Like._meta.get_field("created_at").column),
+        "post_id": qn(Post._meta.pk.column),
+        "post_author": qn(Post._meta.get_field("author").column),
+        "post_likes": qn(Post._meta.get_field("like_count").column),
+    }
+
+
+def _insert_like(user_id, post_id):
+    """Insert the like row; return the post's author id if it was new."""
+    names = _names()
+    now = Like._meta.get_field("created_at").get_db_prep_value(
+        timezone.now(), connection
+    )
+    insert = (
+        "INSERT INTO {like} ({like_user}, {like_post}, {like_created}) "
+        "SELECT %s, {post_id}, %s FROM {post} WHERE {post_id} = %s "
+        "ON CONFLICT ({like_user}, {like_post}) DO NOTHING"
+    ).format(**names)
+    bump = "UPDATE {post} SET {post_likes} = {post_likes} + 1".format(**names)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"WITH inserted AS ({insert} RETURNING {names['like_post']}) "
+                f"{bump} FROM inserted "
+                f"WHERE {names['post']}.{names['post_id']} = inserted.{names['like_post']} "
+                f"RETURNING {names['post']}.{names['post_author']}",
+                [user_id, now, post_id],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+        cursor.execute(f"{insert} RETURNING {names['like_post']}", [user_id, now, post_id])
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(
+            f"{bump} WHERE {names['post_id']} = %s RETURNING {names['post_author']}",
+            [post_id],
+        )
+        return cursor.fetchone()[0]
+
+
+def _delete_like(user_id, post_id):
+    """Delete the like row; return True if there was one."""
+    names = _names()
+    delete = (
+        "DELETE FROM {like} WHERE {like_user} = %s AND {like_post} = %s"
+    ).format(**names)
+    drop = "UPDATE {post} SET {post_likes} = {post_likes} - 1".format(**names)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"WITH deleted AS ({delete} RETURNING {names['like_post']}) "
+                f"{drop} FROM deleted "
+                f"WHERE {names['post']}.{names['post_id']} = deleted.{names['like_post']} "
+                f"RETURNING {names['post']}.{names['post_id']}",
+                [user_id, post_id],
+            )
+            return cursor.fetchone() is not None
+
+        cursor.execute(f"{delete} RETURNING {names['like_post']}", [user_id, post_id])
+        if cursor.fetchone() is None:
+            return False
+        cursor.execute(f"{drop} WHERE {names['post_id']} = %s", [post_id])
+        return True
+
+
+def _orm_unlike(user_id, post_id):
+    if not Like.objects.filter(user_id=user_id, post_id=post_id).delete()[0]:
+        return False
+    Post.objects.filter(pk=post_id).update(like_count=F("like_count") - 1)
+    return True
+
+
+def record_like(user, post):
+    """Count and announce a Like the caller has just created with the ORM."""
+    Post.objects.filter(pk=post.pk).update(like_count=F("like_count") + 1)
+    if post.author_id != user.pk:
+        notifications.notify_ids(
+            post.author_id, user.pk, "liked your post",
+            ContentType.objects.get_for_model(Post).pk, post.pk,
+        )
+
+
+def like_post(user, post_id):
+    """
+    Like a post. Return True if the like is new, False if it already existed.
+
+    Raises Post.DoesNotExist if there is no such post, and NotSupportedError
+    unless supports_returning(); LikePostView.like_with_orm() is the ORM path.
+    """
+    if not supports_returning():
+        raise NotSupportedError("like_post() needs INSERT ... ON CONFLICT ... RETURNING")
+    with transaction.atomic():
+        author_id = _insert_like(user.pk, post_id)
+
+        if author_id is None:
+            # Cold path only: tell "already liked" apart from "no such post"
+            if not Post.objects.filter(pk=post_id).exists():
+                raise Post.DoesNotExist
+            return False
+
+        notifications.notify_ids(
+            author_id, user.pk, "liked your post",
+            ContentType.objects.get_for_model(Post).pk, post_id,
+        )
+    return True
+
+
+def unlike_post(user, post_id):
+    """
+    Remove a like. Return True if there was one, False otherwise.
+
+    Raises Post.DoesNotExist if there is no such post.
+    """
+    with transaction.atomic():
+        if supports_returning():
+            changed = _delete_like(user.pk, post_id)
+        else:
+            changed = _orm_unlike(user.pk, post_id)
+    if not changed and not Post.objects.filter(pk=post_id).exists():
+        raise Post.DoesNotExist
+    return changed
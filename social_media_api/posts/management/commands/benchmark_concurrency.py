@@ -0,0 +1,131 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.connects = 0
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; return (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif status not in (204, 304):
+        await reader.read()
+        return status, False
+    return status, headers.get("connection", "").lower() != "close"
+
+
+async def client(host, port, request, deadline, timeout, stats):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                stats.connects += 1
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+            stats.latencies.append((time.perf_counter() - start) * 1000)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            stats.errors += 1
+            keep_alive = False
+            await asyncio.sleep(0.05)
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold N concurrent keep-alive connections against a running server and "
+        "report throughput, latency and errors, e.g. `benchmark_concurrency "
+        "http://127.0.0.1:8000/api/feed/ --token KEY --connections 10,100,1000`. "
+        "Run it against the sync (Procfile) and ASGI (gunicorn_asgi.py) "
+        "deployments on the same machine to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--token", help="Sent as `Authorization: Token <token>`.")
+        parser.add_argument("--connections", default="10,50,100,500",
+                            help="Comma-separated concurrency levels.")
+        parser.add_argument("--seconds", type=float, default=10.0,
+                            help="Duration of each level.")
+        parser.add_argument("--timeout", type=float, default=10.0,
+                            help="Seconds before a connect or response counts as an error.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http":
+            raise CommandError("Only http:// URLs are supported.")
+        path = url.path or "/"
+        if url.query:
+            path += "?" + url.query
+        headers = [f"GET {path} HTTP/1.1", f"Host: {url.netloc}", "Accept: application/json"]
+        if options["token"]:
+            headers.append(f"Authorization: Token {options['token']}")
+        request = ("\r\n".join(headers) + "\r\n\r\n").encode()
+
+        for level in (int(n) for n in options["connections"].split(",")):
+            stats = asyncio.run(self.run(
+                url.hostname, url.port or 80, request, level,
+                options["seconds"], options["timeout"],
+            ))
+            self.report(level, options["seconds"], stats)
+
+    async def run(self, host, port, request, connections, seconds, timeout):
+        stats = Stats()
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(
+            client(host, port, request, deadline, timeout, stats) for _ in range(connections)
+        ))
+        return stats
+
+    def report(self, connections, seconds, stats):
+        done = len(stats.latencies)
+        if not done:
+            self.stdout.write(f"{connections:>6} connections: no responses, {stats.errors} errors")
+            return
+        latencies = sorted(stats.latencies)
+        p99 = latencies[min(done - 1, int(done * 0.99))]
+        ok = stats.statuses.get(200, 0) + stats.statuses.get(304, 0)
+        other = " ".join(
+            f"{status}={count}" for status, count in sorted(stats.statuses.items())
+            if status not in (200, 304)
+        )
+        self.stdout.write(
+            f"{connections:>6} connections: {ok / seconds:8.1f} ok/s  "
+            f"p50={statistics.median(latencies):8.1f}ms  p99={p99:8.1f}ms  "
+            f"errors={stats.errors} connects={stats.connects} {other}".rstrip()
+        )
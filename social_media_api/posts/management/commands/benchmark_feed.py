@@ -0,0 +1,48 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts import timeline
+from posts.models import Post
+
+
+def legacy_feed(user):
+    # The original FeedView query, kept here for comparison
+    return Post.objects.filter(author__in=user.following.all()).order_by("-created_at")
+
+
+class Command(BaseCommand):
+    help = "Compare feed latency of the IN-list query and the materialized timeline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20,
+                            help="Sample the users who follow the most accounts.")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=10)
+
+    def handle(self, *args, **options):
+        users = list(
+            get_user_model().objects.annotate(num_following=Count("following"))
+            .filter(num_following__gt=0)
+            .order_by("-num_following")[:options["users"]]
+        )
+        if not users:
+            self.stderr.write("No users follow anyone; seed some data first.")
+            return
+
+        for label, build in (("legacy", legacy_feed), ("timeline", timeline.home_timeline)):
+            timings = []
+            for _ in range(options["iterations"]):
+                for user in users:
+                    start = time.perf_counter()
+                    list(build(user)[:options["page_size"]])
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f"{label:>8}: p50={statistics.median(timings):.2f}ms "
+                f"p99={p99:.2f}ms over {len(timings)} reads"
+            )
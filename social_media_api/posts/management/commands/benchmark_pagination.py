@@ -0,0 +1,99 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from posts.models import Post
+from social_media_api.pagination import KeysetPagination, StandardResultsSetPagination
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time exact-count page-number pages against keyset pages at increasing "
+        "depth, e.g. `benchmark_pagination --rows 10000000`. Seeded posts are "
+        "rolled back afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000,
+                            help="Seed the posts table up to this many rows.")
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--keep", action="store_true",
+                            help="Commit the seeded posts instead of rolling them back.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"])
+                self.run(options["rows"], options["page_size"], options["repeat"])
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, rows, page_size, repeat):
+        factory = APIRequestFactory()
+        depth = 1
+        while depth * page_size <= rows:
+            offset = (depth - 1) * page_size
+            # The cursor a client would hold after scrolling `offset` rows
+            params = {"page_size": page_size}
+            if offset:
+                last = Post.objects.order_by("-created_at", "-id")[offset - 1]
+                params["cursor"] = KeysetPagination().encode_cursor(
+                    [last.created_at.isoformat(), last.id], reverse=False
+                )
+            keyset_request = Request(factory.get("/api/posts/", params))
+            offset_request = Request(factory.get("/api/posts/", {"page": depth, "page_size": page_size}))
+
+            offset_ms = self.time(repeat, lambda: self.offset_page(offset_request))
+            keyset_ms = self.time(repeat, lambda: self.keyset_page(keyset_request))
+            self.stdout.write(
+                f"page {depth:>9}: offset={offset_ms:8.2f}ms  keyset={keyset_ms:8.2f}ms"
+            )
+            depth *= 10
+
+    def offset_page(self, request):
+        paginator = StandardResultsSetPagination()
+        paginator.count_mode = "exact"
+        # Paginator.page() validates the number against the full COUNT(*)
+        paginator.paginate_queryset(Post.objects.order_by("-created_at", "-id"), request)
+
+    def keyset_page(self, request):
+        paginator = KeysetPagination()
+        paginator.paginate_queryset(Post.objects.all(), request)
+
+    def time(self, repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, rows):
+        missing = rows - Post.objects.count()
+        if missing <= 0:
+            return
+        author, _ = get_user_model().objects.get_or_create(username="benchmark")
+        self.stdout.write(f"Seeding {missing} posts...")
+        batch = 10_000
+        while missing > 0:
+            size = min(batch, missing)
+            Post.objects.bulk_create(
+                [Post(author=author, title="bench", content="x") for _ in range(size)]
+            )
+            missing -= size
+        if connection.vendor == "postgresql":
+            # Autovacuum never sees uncommitted rows; give the planner stats
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(Post._meta.db_table)}")
@@ -0,0 +1,113 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Post
+from posts.search import IcontainsSearchBackend, get_backend, search_posts, terms
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "dar", "pel", "quon"]
+
+
+def vocabulary(size=20_000):
+    """Synthetic words; word i occurs with weight 1/(i+1), like natural text."""
+    rng = random.Random(0)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    words = sorted(words, key=lambda word: (len(word), word))
+    weights = [1 / (rank + 1) for rank in range(size)]
+    return words, weights
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time first-page search with icontains (DRF SearchFilter) against the "
+        "full-text backend, e.g. `benchmark_search --rows 1000000`. Seeded "
+        "posts are rolled back afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000,
+                            help="Seed the posts table up to this many rows.")
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--query", action="append", dest="queries",
+                            help="Query to time; may be repeated.")
+        parser.add_argument("--keep", action="store_true",
+                            help="Commit the seeded posts instead of rolling them back.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"])
+                self.run(options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        words, _ = vocabulary()
+        # A common word, a mid-frequency word, a rare word, a prefix, two words
+        queries = options["queries"] or [
+            words[10], words[1000], words[15_000], words[1000][:4],
+            f"{words[10]} {words[1000]}",
+        ]
+        page_size = options["page_size"]
+        backend = type(get_backend()).__name__
+        self.stdout.write(f"{connection.vendor}, {Post.objects.count()} posts, {backend}")
+
+        for query in queries:
+            icontains_ms = self.time(options["repeat"], lambda: self.icontains_page(query, page_size))
+            fulltext_ms = self.time(options["repeat"], lambda: self.fulltext_page(query, page_size))
+            self.stdout.write(
+                f"{query!r:>16}: icontains={icontains_ms:9.2f}ms  fulltext={fulltext_ms:9.2f}ms"
+            )
+
+    def icontains_page(self, query, page_size):
+        posts = IcontainsSearchBackend().search(Post.objects.all(), terms(query))
+        list(posts.order_by("-created_at", "-id")[:page_size])
+
+    def fulltext_page(self, query, page_size):
+        list(search_posts(Post.objects.all(), query)[:page_size])
+
+    def time(self, repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, rows):
+        missing = rows - Post.objects.count()
+        if missing <= 0:
+            return
+        author, _ = get_user_model().objects.get_or_create(username="benchmark")
+        self.stdout.write(f"Seeding {missing} posts...")
+        words, weights = vocabulary()
+        rng = random.Random(0)
+        batch = 10_000
+        while missing > 0:
+            size = min(batch, missing)
+            Post.objects.bulk_create([
+                Post(
+                    author=author,
+                    title=" ".join(rng.choices(words, weights, k=6)),
+                    content=" ".join(rng.choices(words, weights, k=60)),
+                )
+                for _ in range(size)
+            ])
+            missing -= size
+        if connection.vendor == "postgresql":
+            # Autovacuum never sees uncommitted rows; give the planner stats
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(Post._meta.db_table)}")
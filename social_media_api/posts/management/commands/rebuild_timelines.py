@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild materialized home timelines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only rebuild this user id (repeatable).")
+        parser.add_argument("--limit", type=int, default=None,
+                            help="Posts copied per followed author "
+                                 "(default: TIMELINE_BACKFILL_LIMIT).")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Users loaded per query.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["users"]:
+            users = users.filter(id__in=options["users"])
+
+        rebuilt = entries = 0
+        for user in users.iterator(chunk_size=options["batch_size"]):
+            entries += timeline.rebuild(user, limit=options["limit"])
+            rebuilt += 1
+            if rebuilt % options["batch_size"] == 0:
+                self.stdout.write(f"{rebuilt} timelines rebuilt...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rebuilt} timelines ({entries} entries)."
+        ))
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Like, Post
+
+User = get_user_model()
+Follow = User.following.through
+
+
+def count_of(model, column):
+    """Correlated COUNT(*) of ``model`` rows whose ``column`` points at the outer row."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{column: OuterRef("pk")})
+        .values(column).annotate(n=Count("*")).values("n")
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized like/comment/follow counters and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows checked per id range.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        counters = [
+            (Post, "like_count", count_of(Like, "post")),
+            (Post, "comment_count", count_of(Comment, "post")),
+            (User, "follower_count", count_of(Follow, "to_customuser")),
+            (User, "following_count", count_of(Follow, "from_customuser")),
+        ]
+        for model, field, actual in counters:
+            repaired = self.repair(model, field, actual, options["batch_size"], options["dry_run"])
+            verb = "drifted" if options["dry_run"] else "repaired"
+            self.stdout.write(f"{model.__name__}.{field}: {repaired} rows {verb}")
+
+    def repair(self, model, field, actual, batch_size, dry_run):
+        repaired = 0
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects.filter(pk__gt=last_id).order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return repaired
+            last_id = ids[-1]
+
+            drifted = (
+                model.objects.filter(pk__in=ids)
+                .annotate(actual=actual)
+                .exclude(**{field: F("actual")})
+                .values_list("pk", flat=True)
+            )
+            if dry_run:
+                repaired += drifted.count()
+                continue
+            with transaction.atomic():
+                repaired += model.objects.filter(pk__in=list(drifted)).update(**{field: actual})
@@ -9,6 +9,17 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, maintained with F() updates; see reconcile_counters
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination key, see social_media_api/pagination.py
+            models.Index(fields=["-created_at", "-id"], name="post_recent_idx"),
+            # Fan-out-on-read path of the home timeline (high-follower authors)
+            models.Index(fields=["author", "-created_at"], name="post_author_recent_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -21,6 +32,11 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="comment_recent_idx"),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author} on {self.post}"
 
@@ -39,3 +55,32 @@ class Like(models.Model):
 
     def __str__(self):
         return f"{self.user.username} likes {self.post.title}"
+
+
+class TimelineEntry(models.Model):
+    """
+    One row of a user's materialized home timeline.
+
+    Rows are written when a followed author publishes (fan-out on write), so
+    reading the feed is a range scan on (user, created_at) instead of an
+    IN-list over everyone the user follows.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="timeline_entries")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    # Copy of post.created_at so the timeline can be ordered from its own index
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-post"], name="timeline_user_recent_idx"),
+            models.Index(fields=["user", "author"], name="timeline_user_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in timeline of {self.user_id}"
@@ -0,0 +1,106 @@
+"""
+Full-text search over posts.
+
+DRF's SearchFilter compiles ``?search=`` to ``title ILIKE '%q%' OR content
+ILIKE '%q%'``, which scans every row. Instead each database keeps its own
+index, maintained by triggers so that bulk_create() and update() are covered
+too (see migration 0005_search_index):
+
+* PostgreSQL: a weighted ``search_vector`` tsvector column with a GIN index,
+  ranked with ts_rank_cd.
+* SQLite: an external-content FTS5 table, ranked with bm25().
+
+Every term is matched as a prefix ("djan" finds "django") and all terms must
+match. Title hits weigh more than content hits. Other databases fall back to
+icontains. POST_SEARCH_BACKEND (a dotted path) overrides the choice.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .models import Post
+
+# Text search configuration baked into the PostgreSQL trigger
+SEARCH_CONFIG = "english"
+FTS_TABLE = "posts_post_fts"
+
+
+def terms(query):
+    """Split a user query into bare word tokens, dropping all syntax."""
+    return re.findall(r"\w+", query.lower())
+
+
+class IcontainsSearchBackend:
+    """Unindexed fallback, same matching as DRF's SearchFilter."""
+
+    def search(self, queryset, words):
+        for word in words:
+            queryset = queryset.filter(Q(title__icontains=word) | Q(content__icontains=word))
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend:
+    def search(self, queryset, words):
+        tsquery = " & ".join(f"{word}:*" for word in words)
+        table = connection.ops.quote_name(Post._meta.db_table)
+        match = f"{table}.search_vector @@ to_tsquery(%s::regconfig, %s)"
+        rank = f"ts_rank_cd({table}.search_vector, to_tsquery(%s::regconfig, %s))"
+        params = (SEARCH_CONFIG, tsquery)
+        return queryset.filter(
+            RawSQL(match, params, output_field=BooleanField())
+        ).annotate(search_rank=RawSQL(rank, params, output_field=FloatField()))
+
+
+class SQLiteSearchBackend:
+    # bm25() column weights: title, content
+    weights = (10.0, 1.0)
+
+    def search(self, queryset, words):
+        match = " ".join(f'"{word}"*' for word in words)
+        table = connection.ops.quote_name(Post._meta.db_table)
+        # bm25() is lower-is-better, negate it so every backend sorts rank desc
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+            select={"search_rank": "-bm25({}, {}, {})".format(FTS_TABLE, *self.weights)},
+        )
+
+
+BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_backend():
+    path = getattr(settings, "POST_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    return BACKENDS.get(connection.vendor, IcontainsSearchBackend)()
+
+
+def search_posts(queryset, query):
+    """
+    Filter ``queryset`` to posts matching every word of ``query``, best
+    match first. Returns the queryset unchanged when ``query`` has no words.
+    """
+    words = terms(query)
+    if not words:
+        return queryset
+    return get_backend().search(queryset, words).order_by("-search_rank", "-created_at", "-id")
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Drop-in replacement for SearchFilter on post lists; reads ``?search=``."""
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        return search_posts(queryset, query)
@@ -17,5 +17,10 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ["id", "author", "title", "content", "created_at", "updated_at", "comments"]
-        read_only_fields = ["author", "created_at", "updated_at", "comments"]
+        fields = [
+            "id", "author", "title", "content", "created_at", "updated_at",
+            "like_count", "comment_count", "comments",
+        ]
+        read_only_fields = [
+            "author", "created_at", "updated_at", "like_count", "comment_count", "comments",
+        ]
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from . import timeline
+from .models import TimelineEntry
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.following.through)
+def sync_timeline_on_follow(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep materialized timelines in step with follow/unfollow."""
+    if action == "post_clear":
+        lookup = {"author": instance} if reverse else {"user": instance}
+        TimelineEntry.objects.filter(**lookup).delete()
+        return
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    # Normalise to (follower, [authors]) pairs; reverse means instance is the author
+    if reverse:
+        pairs = [(follower_id, [instance.pk]) for follower_id in pk_set]
+    else:
+        pairs = [(instance.pk, list(pk_set))]
+
+    for follower_id, author_ids in pairs:
+        if action == "post_add":
+            timeline.backfill(follower_id, author_ids)
+        else:
+            timeline.remove_authors(follower_id, author_ids)
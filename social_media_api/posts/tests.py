@@ -1,3 +1,555 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipIf
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from accounts import follows
+from accounts.views import AsyncProfileView, ProfileView
+from social_media_api.asyncviews import read_view
+from social_media_api.pagination import LazyCountPaginator, StandardResultsSetPagination
+from social_media_api.testing import QueryBudgetMixin
+from notifications import services as notifications
+from notifications.models import Notification
+from notifications.views import AsyncNotificationListView, NotificationListView
+from . import likes, timeline
+from .views import AsyncFeedView, AsyncPostDetailView, AsyncPostListView, FeedView, PostViewSet
+from .models import Comment, Like, Post, TimelineEntry
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TimelineTests(TestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader", password="pass12345")
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.other = User.objects.create_user(username="other", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        self.reader.following.add(self.author)
+        self.client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/posts/", {"title": "Hi", "content": "Hello"})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post_id=response.data["id"]).exists()
+        )
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        post = Post.objects.create(author=self.author, title="Old", content="...")
+        Post.objects.create(author=self.other, title="Unrelated", content="...")
+
+        self.reader.following.add(self.author)
+        self.assertEqual(list(timeline.home_timeline(self.reader)), [post])
+
+        self.reader.following.remove(self.author)
+        self.assertEqual(list(timeline.home_timeline(self.reader)), [])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2)
+    def test_backfill_takes_latest_posts_of_each_author_in_one_query(self):
+        posts = [Post.objects.create(author=author, title=str(i), content="...")
+                 for i in range(3) for author in (self.author, self.other)]
+        with self.assertNumQueries(3):
+            self.assertEqual(timeline.backfill(self.reader.pk, [self.author.pk, self.other.pk]), 4)
+        self.assertEqual(set(timeline.home_timeline(self.reader)), set(posts[2:]))
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_high_follower_authors_are_read_on_demand(self):
+        follows.follow(self.reader, self.author)
+        post = Post.objects.create(author=self.author, title="Viral", content="...")
+
+        self.assertEqual(timeline.fan_out_post(post), 0)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(timeline.home_timeline(self.reader)), [post])
+
+    def test_feed_view_reads_timeline(self):
+        self.reader.following.add(self.author)
+        post = Post.objects.create(author=self.author, title="Hi", content="...")
+        timeline.fan_out_post(post)
+
+        response = self.client.get("/api/feed/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["id"] for p in response.data["results"]], [post.id])
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_feed_loads_pull_authors_once_per_request(self):
+        follows.follow(self.reader, self.author)
+        post = Post.objects.create(author=self.author, title="Viral", content="...")
+        for view in (FeedView, AsyncFeedView):
+            request = APIRequestFactory().get("/api/feed/")
+            force_authenticate(request, self.reader)
+            handler = view.as_view()
+            if iscoroutinefunction(handler):
+                handler = async_to_sync(handler)
+            with CaptureQueriesContext(connection) as queries:
+                response = handler(request)
+            pull_queries = [q for q in queries.captured_queries
+                            if '"follower_count" >' in q["sql"]]
+            self.assertEqual(len(pull_queries), 1, view)
+            self.assertEqual([p["id"] for p in response.data["results"]], [post.id])
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                return "\n".join(row[-1] for row in cursor.fetchall())
+            # Tiny tables make sequential scans and sorts cheapest; rule them
+            # out to see whether the index can serve the page
+            cursor.execute("SET enable_seqscan = off; SET enable_sort = off")
+            try:
+                cursor.execute("EXPLAIN " + sql)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute("RESET enable_seqscan; RESET enable_sort")
+
+    def test_feed_pages_range_scan_the_timeline_index(self):
+        self.reader.following.add(self.author)
+        posts = [Post.objects.create(author=self.author, title=str(i), content="...")
+                 for i in range(3)]
+        for post in posts:
+            timeline.fan_out_post(post)
+
+        next_url = self.client.get("/api/feed/", {"page_size": 2}).data["next"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(next_url)
+        self.assertEqual([p["id"] for p in response.data["results"]], [posts[0].id])
+        sql = next(query["sql"] for query in queries
+                   if "posts_timelineentry" in query["sql"] and "LIMIT" in query["sql"])
+        plan = self.explain(sql)
+        self.assertIn("timeline_user_recent_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        self.assertNotIn("Sort", plan)
+
+
+class CountModeTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username="reader")
+        for i in range(5):
+            Post.objects.create(author=user, title=f"Post {i}", content="...")
+        self.factory = APIRequestFactory()
+
+    def paginate(self, mode, **params):
+        pagination = StandardResultsSetPagination()
+        request = Request(self.factory.get("/api/posts/", {"page_size": 2, **params}))
+        view = mock.Mock(pagination_count_mode=mode)
+        page = pagination.paginate_queryset(Post.objects.order_by("id"), request, view=view)
+        return pagination, pagination.get_paginated_response([post.id for post in page]).data
+
+    def test_approximate_count_is_capped(self):
+        _, data = self.paginate("approximate")
+        self.assertEqual((data["count"], data["count_is_exact"]), (5, True))
+        self.assertIn("page=2", data["next"])
+
+        with mock.patch.object(LazyCountPaginator, "count_limit", 3):
+            _, data = self.paginate("approximate", page=3)
+        self.assertEqual((data["count"], data["count_is_exact"]), (4, False))
+        self.assertIsNone(data["next"])
+
+    def test_no_count(self):
+        pagination, data = self.paginate("none", page=2)
+        self.assertNotIn("count", data)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIn("page=3", data["next"])
+        self.assertFalse(pagination.page.paginator.count_is_exact)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="pass12345")
+        self.posts = [
+            Post.objects.create(author=self.user, title=f"Post {i}", content="...")
+            for i in range(7)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, response):
+        return [post["id"] for post in response.data["results"]]
+
+    def test_walks_forward_and_back_without_count(self):
+        newest_first = [post.id for post in reversed(self.posts)]
+
+        first = self.client.get("/api/posts/", {"page_size": 3})
+        self.assertNotIn("count", first.data)
+        self.assertEqual(self.ids(first), newest_first[:3])
+        self.assertIsNone(first.data["previous"])
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual(self.ids(second), newest_first[3:6])
+
+        third = self.client.get(second.data["next"])
+        self.assertEqual(self.ids(third), newest_first[6:])
+        self.assertIsNone(third.data["next"])
+
+        back = self.client.get(third.data["previous"])
+        self.assertEqual(self.ids(back), newest_first[3:6])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get("/api/posts/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, POST_INLINE_COMMENTS_LIMIT=2)
+class PostQueryCountTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader", password="pass12345")
+        authors = [User.objects.create_user(username=f"author{i}") for i in range(3)]
+        for i in range(10):
+            post = Post.objects.create(author=authors[i % 3], title=f"Post {i}", content="...")
+            for author in authors:
+                Comment.objects.create(post=post, author=author, content="Nice")
+        self.reader.following.add(*authors)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_list_endpoints_do_not_grow_with_page_size(self):
+        self.assertQueryCountFlat("/api/posts/")
+        self.assertQueryCountFlat("/api/feed/")
+        self.assertQueryCountFlat("/api/comments/")
+
+    def test_only_latest_comments_are_inlined(self):
+        response = self.client.get("/api/posts/", {"page_size": 1})
+        comments = response.data["results"][0]["comments"]
+        self.assertEqual(len(comments), 2)
+        self.assertEqual(comments[0]["author"]["username"], "author2")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="poller", password="pass12345")
+        self.post = Post.objects.create(author=self.user, title="Django", content="...")
+        self.comment = Comment.objects.create(post=self.post, author=self.user, content="Hi")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, etag=None, **params):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(url, params, **headers)
+
+    def test_current_etag_gets_304_without_serializing(self):
+        for url, params in (("/api/posts/", {}), ("/api/posts/", {"search": "djan"}),
+                            (f"/api/posts/{self.post.pk}/", {}), ("/api/comments/", {})):
+            with CaptureQueriesContext(connection) as plain:
+                etag = self.get(url, **params)["ETag"]
+            # A list's 304 loads the page, a detail's runs the validator aggregates
+            expected = 2 if url.endswith(f"/{self.post.pk}/") else len(plain)
+            with self.assertNumQueries(expected):
+                response = self.get(url, etag, **params)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_lists_do_not_aggregate_the_table(self):
+        for url in ("/api/posts/", "/api/feed/", "/api/comments/"):
+            for etag in (None, '"stale"'):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.get(url, etag, page_size=5)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("ETag", response)
+                for query in queries:
+                    self.assertNotIn("MAX(", query["sql"].upper(), url)
+                    self.assertNotIn("COUNT(", query["sql"].upper(), url)
+
+    def test_page_changes_change_the_etag(self):
+        etag = self.get("/api/comments/")["ETag"]
+        Comment.objects.filter(pk=self.comment.pk).update(content="Edited", updated_at=timezone.now())
+        self.assertEqual(self.get("/api/comments/", etag).status_code, 200)
+
+        url = "/api/posts/"
+        etag = self.get(url, page_size=1)["ETag"]
+        Post.objects.create(author=self.user, title="Newer", content="...")
+        self.assertEqual(self.get(url, etag, page_size=1).status_code, 200)
+
+    def test_filters_and_pages_have_their_own_etags(self):
+        etags = {self.get("/api/posts/", **params)["ETag"]
+                 for params in ({}, {"search": "django"}, {"page_size": 1})}
+        self.assertEqual(len(etags), 3)
+
+    def test_changes_that_skip_updated_at_still_change_the_etag(self):
+        url = f"/api/posts/{self.post.pk}/"
+        etag = self.get(url)["ETag"]
+        likes.like_post(User.objects.create_user(username="fan"), self.post.pk)
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+        etag = self.get(url)["ETag"]
+        Comment.objects.filter(pk=self.comment.pk).update(content="Edited", updated_at=timezone.now())
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+        etag = self.get("/api/posts/")["ETag"]
+        self.post.delete()
+        self.assertEqual(self.get("/api/posts/", etag).status_code, 200)
+
+    def test_missing_post_is_still_not_found(self):
+        for url in ("/api/posts/999/", "/api/posts/abc/", "/api/comments/abc/"):
+            self.assertEqual(self.get(url, '"stale"').status_code, 404, url)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="pass12345")
+        self.post = Post.objects.create(author=self.user, title="Hi", content="...")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_like_and_unlike_update_like_count(self):
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+        self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_create_and_delete_update_comment_count(self):
+        response = self.client.post("/api/comments/", {"post": self.post.pk, "content": "First"})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        self.client.delete(f"/api/comments/{response.data['id']}/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_reconcile_counters_repairs_drift(self):
+        Comment.objects.create(post=self.post, author=self.user, content="Untracked")
+        Post.objects.filter(pk=self.post.pk).update(like_count=7)
+
+        call_command("reconcile_counters", stdout=open("/dev/null", "w"))
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 1))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LikeTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.post = Post.objects.create(author=self.author, title="Hi", content="...")
+        self.client = APIClient()
+        self.client.force_authenticate(self.fan)
+
+    def test_like_is_idempotent_and_notifies_once(self):
+        first = self.client.post(f"/api/posts/{self.post.pk}/like/")
+        second = self.client.post(f"/api/posts/{self.post.pk}/like/")
+
+        self.assertEqual((first.status_code, first.data["changed"]), (200, True))
+        self.assertEqual((second.status_code, second.data["changed"]), (200, False))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        notifications.drain_all()
+        self.assertEqual(Notification.objects.get().target, self.post)
+
+    def test_unlike_without_like_changes_nothing(self):
+        response = self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+        self.assertEqual((response.status_code, response.data["changed"]), (200, False))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_missing_post_is_not_found(self):
+        self.assertEqual(self.client.post("/api/posts/999/like/").status_code, 404)
+        self.assertEqual(self.client.post("/api/posts/999/unlike/").status_code, 404)
+
+    def test_like_and_counter_share_one_statement_on_postgresql(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(likes.like_post(self.fan, self.post.pk))
+        writes = [query["sql"] for query in queries
+                  if query["sql"].startswith(("WITH", "INSERT", "UPDATE"))]
+        if connection.vendor == "postgresql":
+            # Like row and like_count in one data-modifying CTE
+            self.assertEqual(len(writes), 2)
+            self.assertTrue(writes[0].startswith("WITH inserted AS (INSERT INTO"))
+        else:
+            self.assertEqual(len(writes), 3)
+        self.assertIn("notifications_notificationevent", writes[-1])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_backends_without_returning_use_the_orm(self):
+        with mock.patch.object(likes, "supports_returning", return_value=False):
+            first = self.client.post(f"/api/posts/{self.post.pk}/like/")
+            second = self.client.post(f"/api/posts/{self.post.pk}/like/")
+            missing = self.client.post("/api/posts/999/like/")
+
+        self.assertEqual((first.data["changed"], second.data["changed"]), (True, False))
+        self.assertEqual(missing.status_code, 404)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        notifications.drain_all()
+        self.assertEqual(Notification.objects.get().target, self.post)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="searcher", password="pass12345")
+        self.in_title = Post.objects.create(
+            author=self.user, title="Django tips", content="Keep views thin."
+        )
+        self.in_content = Post.objects.create(
+            author=self.user, title="Weekend", content="Read the Django docs."
+        )
+        Post.objects.create(author=self.user, title="Cooking", content="Pasta.")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        response = self.client.get("/api/posts/", {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return [post["id"] for post in response.data["results"]]
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual(self.search("django"), [self.in_title.id, self.in_content.id])
+
+    def test_matches_prefixes_and_requires_every_term(self):
+        self.assertEqual(self.search("djan"), [self.in_title.id, self.in_content.id])
+        self.assertEqual(self.search("djan docs"), [self.in_content.id])
+        self.assertEqual(self.search("zebra"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        Post.objects.filter(pk=self.in_title.pk).update(title="Flask tips")
+        self.assertEqual(self.search("django"), [self.in_content.id])
+        self.in_content.delete()
+        self.assertEqual(self.search("django"), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"django*"^:'), [self.in_title.id, self.in_content.id])
+
+    def test_search_results_are_paged_by_number(self):
+        response = self.client.get("/api/posts/", {"search": "django", "page_size": 1})
+        self.assertEqual(response.data["count"], 2)
+        self.assertIn("page=2", response.data["next"])
+
+
+@skipIf(connection.vendor == "sqlite", "the in-memory SQLite test database locks concurrent writers")
+class LikeConcurrencyTests(TransactionTestCase):
+    """Hammer one post with racing like/unlike taps from many threads."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author")
+        self.fans = [User.objects.create_user(username=f"fan{i}") for i in range(8)]
+        self.post = Post.objects.create(author=self.author, title="Hi", content="...")
+
+    def tap(self, user, action, times=20):
+        try:
+            for _ in range(times):
+                action(user, self.post.pk)
+        finally:
+            connection.close()
+
+    def test_racing_double_taps_keep_counter_exact(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            jobs = [pool.submit(self.tap, fan, likes.like_post) for fan in self.fans * 2]
+            for job in jobs:
+                job.result()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, len(self.fans))
+        self.assertEqual(Like.objects.filter(post=self.post).count(), len(self.fans))
+        notifications.drain_all()
+        self.assertEqual(Notification.objects.get().actor_count, len(self.fans))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            jobs = [pool.submit(self.tap, fan, likes.unlike_post) for fan in self.fans * 2]
+            for job in jobs:
+                job.result()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertFalse(Like.objects.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AsyncViewTests(TestCase):
+    """The async variants answer exactly like the sync views they mirror."""
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader")
+        self.author = User.objects.create_user(username="author")
+        follows.follow(self.reader, self.author)
+        self.posts = [Post.objects.create(author=self.author, title=f"Post {i}", content="...")
+                      for i in range(3)]
+        Comment.objects.create(post=self.posts[0], author=self.reader, content="Hi")
+        for post in self.posts:
+            timeline.fan_out_post(post)
+        notifications.notify(self.author, self.reader, "followed")
+        notifications.drain_all()
+        self.factory = APIRequestFactory()
+
+    def call(self, view, path, headers=None, **kwargs):
+        request = self.factory.get(path, **(headers or {}))
+        force_authenticate(request, self.reader)
+        if iscoroutinefunction(view):
+            view = async_to_sync(view)
+        return view(request, **kwargs).render()
+
+    def views(self):
+        pk = self.posts[0].pk
+        return [
+            (FeedView.as_view(), AsyncFeedView.as_view(), "/api/feed/?page_size=2", {}),
+            (PostViewSet.as_view({"get": "list"}), AsyncPostListView.as_view(),
+             "/api/posts/?page_size=2", {}),
+            (PostViewSet.as_view({"get": "list"}), AsyncPostListView.as_view(),
+             "/api/posts/?search=post", {}),
+            (PostViewSet.as_view({"get": "retrieve"}), AsyncPostDetailView.as_view(),
+             f"/api/posts/{pk}/", {"pk": pk}),
+            (PostViewSet.as_view({"get": "retrieve"}), AsyncPostDetailView.as_view(),
+             "/api/posts/999999/", {"pk": 999999}),
+            (NotificationListView.as_view(), AsyncNotificationListView.as_view(),
+             "/notifications/", {}),
+            (ProfileView.as_view(), AsyncProfileView.as_view(), "/accounts/profile/", {}),
+        ]
+
+    def test_same_responses_and_queries(self):
+        for sync_view, async_view, path, kwargs in self.views():
+            with self.subTest(path=path):
+                with CaptureQueriesContext(connection) as sync_queries:
+                    expected = self.call(sync_view, path, **kwargs)
+                with CaptureQueriesContext(connection) as async_queries:
+                    response = self.call(async_view, path, **kwargs)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+                self.assertEqual(len(async_queries), len(sync_queries))
+
+    def test_current_etag_gets_304(self):
+        for _, async_view, path, kwargs in self.views():
+            etag = self.call(async_view, path, **kwargs).get("ETag")
+            if etag:
+                response = self.call(async_view, path, {"HTTP_IF_NONE_MATCH": etag}, **kwargs)
+                self.assertEqual(response.status_code, 304, path)
+
+    def test_read_view_routes_by_setting(self):
+        sync_view = PostViewSet.as_view({"get": "list", "post": "create"})
+        async_view = AsyncPostListView.as_view()
+        with self.settings(ASYNC_VIEWS=False):
+            self.assertIs(read_view(sync_view, async_view), sync_view)
+        with self.settings(ASYNC_VIEWS=True):
+            view = read_view(sync_view, async_view)
+        self.assertTrue(iscoroutinefunction(view))
+
+        request = self.factory.post("/api/posts/", {"title": "New", "content": "..."}, format="json")
+        force_authenticate(request, self.reader)
+        response = async_to_sync(view)(request)
+        self.assertEqual(response.status_code, 201)
 
-# Create your tests here.
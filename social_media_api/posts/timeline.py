@@ -0,0 +1,156 @@
+"""
+Materialized home timelines.
+
+Posts from regular authors are pushed into each follower's timeline when they
+are created (fan-out on write). Authors with more than
+TIMELINE_FANOUT_THRESHOLD followers are not fanned out; their posts are pulled
+in at read time instead (fan-out on read), so one celebrity post never turns
+into millions of inserts.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Post, TimelineEntry
+
+User = get_user_model()
+Follow = User.following.through
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def fanout_threshold():
+    return getattr(settings, "TIMELINE_FANOUT_THRESHOLD", 5000)
+
+
+def backfill_limit():
+    return getattr(settings, "TIMELINE_BACKFILL_LIMIT", 200)
+
+
+def follower_ids(author_id):
+    return Follow.objects.filter(to_customuser_id=author_id).values_list(
+        "from_customuser_id", flat=True
+    )
+
+
+def is_pull_author(author_id):
+    """True if this author's posts are read on demand instead of fanned out."""
+    return User.objects.filter(
+        pk=author_id, follower_count__gt=fanout_threshold()
+    ).exists()
+
+
+def pull_author_ids(user):
+    """Followed authors whose posts are merged into the feed at read time."""
+    return user.following.filter(
+        follower_count__gt=fanout_threshold()
+    ).values_list("id", flat=True)
+
+
+def _entries(user_ids, post):
+    return [
+        TimelineEntry(user_id=user_id, post_id=post.id, author_id=post.author_id,
+                      created_at=post.created_at)
+        for user_id in user_ids
+    ]
+
+
+def fan_out_post(post):
+    """Push a newly created post into every follower's timeline."""
+    if is_pull_author(post.author_id):
+        return 0
+
+    written = 0
+    batch = []
+    for user_id in follower_ids(post.author_id).iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(user_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(_entries(batch, post), ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(_entries(batch, post), ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def backfill(user_id, author_ids, limit=None):
+    """Copy the latest posts of newly followed authors into a timeline."""
+    limit = backfill_limit() if limit is None else limit
+    author_ids = list(author_ids)
+    if not author_ids or limit <= 0:
+        return 0
+    pulled = set(
+        User.objects.filter(pk__in=author_ids, follower_count__gt=fanout_threshold())
+        .values_list("id", flat=True)
+    )
+    pushed = [author_id for author_id in author_ids if author_id not in pulled]
+    if not pushed:
+        return 0
+
+    # The newest ``limit`` posts of every author in one query, however many
+    # authors were followed at once
+    posts = (
+        Post.objects.filter(author_id__in=pushed)
+        .annotate(rank=Window(
+            RowNumber(), partition_by=F("author_id"),
+            order_by=(F("created_at").desc(), F("id").desc()),
+        ))
+        .filter(rank__lte=limit)
+        .values_list("id", "author_id", "created_at")
+    )
+    written = 0
+    batch = []
+    for post_id, author_id, created_at in posts.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id,
+                                   created_at=created_at))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def remove_authors(user_id, author_ids):
+    """Drop posts of unfollowed authors from a timeline."""
+    return TimelineEntry.objects.filter(user_id=user_id, author_id__in=author_ids).delete()[0]
+
+
+def rebuild(user, limit=None):
+    """Recreate a user's timeline from scratch."""
+    TimelineEntry.objects.filter(user=user).delete()
+    return backfill(user.id, user.following.values_list("id", flat=True), limit=limit)
+
+
+def home_timeline(user, pulled=None):
+    """
+    Posts for the user's feed, newest first. ``pulled`` is the user's
+    pull_author_ids() if the caller has already loaded them.
+    """
+    if pulled is None:
+        pulled = list(pull_author_ids(user))
+    return _home_timeline(user, pulled)
+
+
+# Feed sort key. In the common case it is read from the timeline rows, so
+# a page is a range scan of timeline_user_recent_idx with no sort
+FEED_ORDERING = ("-feed_created_at", "-feed_post_id")
+
+
+def _home_timeline(user, pulled):
+    if not pulled:
+        # Common case: a join against the user's own timeline rows
+        posts = Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_created_at=F("timeline_entries__created_at"),
+            feed_post_id=F("timeline_entries__post"),
+        )
+    else:
+        pushed = TimelineEntry.objects.filter(user=user).values("post_id")
+        posts = Post.objects.filter(Q(id__in=pushed) | Q(author_id__in=pulled)).annotate(
+            feed_created_at=F("created_at"), feed_post_id=F("id"),
+        )
+    return posts.order_by(*FEED_ORDERING)
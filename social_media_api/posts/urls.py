@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from social_media_api.asyncviews import async_views_enabled, read_view
 from .views import PostViewSet, CommentViewSet, FeedView
 from .views import (
     PostViewSet,
@@ -8,6 +9,7 @@ from .views import (
     LikePostView,
     UnlikePostView
 )
+from .views import AsyncFeedView, AsyncPostListView, AsyncPostDetailView
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
@@ -15,7 +17,19 @@ router.register(r'comments', CommentViewSet, basename='comment')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('feed/', FeedView.as_view(), name='feed'),
+    path('feed/', read_view(FeedView.as_view(), AsyncFeedView.as_view()), name='feed'),
     path('posts/<int:pk>/like/', LikePostView.as_view(), name='like-post'),
     path('posts/<int:pk>/unlike/', UnlikePostView.as_view(), name='unlike-post'),
 ]
+
+if async_views_enabled():
+    # Post reads go to the async views, ahead of the router's routes
+    post_list = PostViewSet.as_view({'get': 'list', 'post': 'create'})
+    post_detail = PostViewSet.as_view({
+        'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy',
+    })
+    urlpatterns = [
+        path('posts/', read_view(post_list, AsyncPostListView.as_view()), name='post-list'),
+        path('posts/<int:pk>/', read_view(post_detail, AsyncPostDetailView.as_view()),
+             name='post-detail'),
+    ] + urlpatterns
@@ -1,79 +1,149 @@
-from rest_framework import viewsets, generics, permissions, filters
-from rest_framework.pagination import PageNumberPagination
+from rest_framework import viewsets, generics, permissions, status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.generics import get_object_or_404
-from notifications.models import Notification
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum, Window
+from django.db.models.functions import RowNumber
 from .models import Post, Comment, Like
 from .serializers import PostSerializer, CommentSerializer
-from django.contrib.contenttypes.models import ContentType
+from . import likes, search, timeline
+from social_media_api.asyncviews import AsyncListMixin, AsyncRetrieveMixin
+from social_media_api.conditional import ConditionalGetMixin
+from social_media_api.pagination import KeysetPagination, StandardResultsSetPagination
+from social_media_api.query_planner import PlannedQuerysetMixin
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 50
 
+class PostQuerysetMixin(PlannedQuerysetMixin):
+    """
+    Load authors and comments for a page of posts in a fixed number of queries.
+
+    Only the latest POST_INLINE_COMMENTS_LIMIT comments are inlined per post
+    (0 inlines all of them), so a viral post cannot blow up the response.
+    """
+
+    def get_prefetch_overrides(self):
+        comments = Comment.objects.order_by("-created_at", "-id")
+        limit = getattr(settings, "POST_INLINE_COMMENTS_LIMIT", 0)
+        if limit:
+            # Top-K per post in the same single prefetch query
+            comments = comments.annotate(
+                inline_rank=Window(
+                    RowNumber(),
+                    partition_by=F("post_id"),
+                    order_by=[F("created_at").desc(), F("id").desc()],
+                )
+            ).filter(inline_rank__lte=limit)
+        return {"comments": comments}
+
+
+class PostConditionalGetMixin(ConditionalGetMixin):
+    """
+    Validators for post pages: like counts move with F() updates and the
+    inlined comments live in their own table, so both are tracked too.
+    """
+
+    def get_row_validators(self, post):
+        # Comments come from the page's prefetch, only the inlined ones count
+        comments = [(comment.pk, comment.updated_at) for comment in post.comments.all()]
+        return (*super().get_row_validators(post), post.like_count, comments)
+
+    def get_validator_aggregates(self):
+        return {**super().get_validator_aggregates(), "likes": Sum("like_count")}
+
+    def get_validators(self, queryset):
+        validators = super().get_validators(queryset)
+        # Joined from the posts side: search querysets name posts_post in raw
+        # SQL and cannot be nested as a subquery
+        comments = queryset.aggregate(
+            comment_rows=Count("comments"), comments_updated=Max("comments__updated_at")
+        )
+        return {**validators, **comments}
 
-class FeedView(generics.ListAPIView):
+    async def aget_validators(self, queryset):
+        validators = await super().aget_validators(queryset)
+        comments = await queryset.aaggregate(
+            comment_rows=Count("comments"), comments_updated=Max("comments__updated_at")
+        )
+        return {**validators, **comments}
+
+
+class FeedView(PostConditionalGetMixin, PostQuerysetMixin, generics.ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = timeline.FEED_ORDERING
+    # timeline.pull_author_ids() of the requesting user, loaded once per request
+    pulled_author_ids = None
 
     def get_queryset(self):
-        user = self.request.user
-        following_users = user.following.all()
-        return Post.objects.filter(author__in=following_users).order_by('-created_at')
+        # Served from the materialized timeline, see posts/timeline.py
+        if self.pulled_author_ids is None:
+            self.pulled_author_ids = list(timeline.pull_author_ids(self.request.user))
+        return self.plan(timeline.home_timeline(self.request.user, self.pulled_author_ids))
+
+
+class AsyncFeedView(AsyncListMixin, FeedView):
+    """FeedView on the async ORM, routed with ASYNC_VIEWS."""
+    etag_namespace = "FeedView"
+
+    async def aget_queryset(self):
+        if self.pulled_author_ids is None:
+            self.pulled_author_ids = [
+                author_id async for author_id in timeline.pull_author_ids(self.request.user)
+            ]
+        return self.get_queryset()
 
 # LIKE / UNLIKE POST
 # ---------------------------------------------------------
 class LikePostView(APIView):
+    """
+    Like a post. Idempotent: liking twice is not an error, see posts/likes.py.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
+        if likes.supports_returning():
+            try:
+                changed = likes.like_post(request.user, pk)
+            except Post.DoesNotExist:
+                raise NotFound("Post not found.")
+        else:
+            changed = self.like_with_orm(request, pk)
 
-        # Checker-required exact line:
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        detail = "Post liked" if changed else "Already liked"
+        return Response({"detail": detail, "liked": True, "changed": changed},
+                        status=status.HTTP_200_OK)
 
-        if not created:
-            return Response({"detail": "Already liked"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Optional: add notification
-        if post.author != request.user:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb="liked your post",
-                target_content_type=ContentType.objects.get_for_model(post),
-                target_object_id=post.id,
-            )
-
-        return Response({"detail": "Post liked"}, status=status.HTTP_200_OK)
-
-
-        # Notify author
-        if post.author != request.user:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb="liked your post",
-                target_content_type=ContentType.objects.get_for_model(post),
-                target_object_id=post.id,
-            )
-
-        return Response({"detail": "Post liked"}, status=status.HTTP_201_CREATED)
+    def like_with_orm(self, request, pk):
+        """Fallback for backends without INSERT ... RETURNING."""
+        post = generics.get_object_or_404(Post, pk=pk)
+        with transaction.atomic():
+            # Checker-required exact line
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                likes.record_like(request.user, post)
+        return created
 
 
 class UnlikePostView(generics.GenericAPIView):
+    """
+    Remove a like. Idempotent: unliking a post you have not liked is not an error.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
+        try:
+            changed = likes.unlike_post(request.user, pk)
+        except Post.DoesNotExist:
+            raise NotFound("Post not found.")
 
-        like = Like.objects.filter(user=request.user, post=post).first()
-        if not like:
-            return Response({"detail": "You have not liked this post"}, status=status.HTTP_400_BAD_REQUEST)
-
-        like.delete()
-        return Response({"detail": "Post unliked"}, status=status.HTTP_200_OK)
+        detail = "Post unliked" if changed else "You have not liked this post"
+        return Response({"detail": detail, "liked": False, "changed": changed},
+                        status=status.HTTP_200_OK)
 
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
@@ -86,23 +156,54 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         return obj.author == request.user
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewMixin(PostConditionalGetMixin, PostQuerysetMixin):
+    etag_namespace = "PostViewSet"
     queryset = Post.objects.all().order_by("-created_at")
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
-    pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title", "content"]
+    pagination_class = KeysetPagination
+    filter_backends = [search.FullTextSearchFilter]
+
+    @property
+    def paginator(self):
+        # Search results are ordered by rank, which a keyset cursor cannot seek on
+        if not hasattr(self, "_paginator"):
+            query = self.request.query_params.get(search.FullTextSearchFilter.search_param, "")
+            searching = search.terms(query)
+            self._paginator = (
+                StandardResultsSetPagination() if searching else self.pagination_class()
+            )
+        return self._paginator
+
+
+class PostViewSet(PostViewMixin, viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        transaction.on_commit(lambda: timeline.fan_out_post(post))
+
+
+class AsyncPostListView(AsyncListMixin, PostViewMixin, generics.GenericAPIView):
+    """PostViewSet's list on the async ORM, routed with ASYNC_VIEWS."""
+
+
+class AsyncPostDetailView(AsyncRetrieveMixin, PostViewMixin, generics.GenericAPIView):
+    """PostViewSet's retrieve on the async ORM, routed with ASYNC_VIEWS."""
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, PlannedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all().order_by("-created_at")
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            Post.objects.filter(pk=comment.post_id).update(comment_count=F("comment_count") + 1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            post_id = instance.post_id
+            instance.delete()
+            Post.objects.filter(pk=post_id).update(comment_count=F("comment_count") - 1)
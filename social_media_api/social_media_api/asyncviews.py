@@ -0,0 +1,173 @@
+"""
+Async read path for DRF views.
+
+DRF runs every view synchronously, so under ASGI each request holds a
+thread while it waits on the database. The mixins here turn a view's GET
+into a coroutine that queries with Django's async ORM (aaggregate,
+``async for``, aget), keeping the view's own queryset, filters,
+pagination, conditional GET and serializer:
+
+* AsyncAPIViewMixin: an async dispatch(). Authentication, permissions and
+  throttling still run sync, in a thread (token authentication is usually
+  answered from cache, see accounts/authentication.py).
+* AsyncListMixin / AsyncRetrieveMixin: ``list``/``retrieve`` for generic
+  views. A view whose get_queryset() queries overrides aget_queryset().
+
+Serializers must find everything they read already loaded: a lazy query
+inside one raises SynchronousOnlyOperation. The planned querysets
+(social_media_api/query_planner.py) take care of that.
+
+read_view() picks the sync or async variant for a URL from the
+ASYNC_VIEWS setting, read when the URLconf loads. Async variants only pay
+off under an ASGI server (see gunicorn_asgi.py); under WSGI Django runs
+each one in its own event loop.
+
+Under ASGI every request in flight holds a database connection of its own,
+so the routed views admit at most ASYNC_VIEWS_CONCURRENCY requests per
+worker at a time. The rest wait in the event loop, which costs an open
+socket rather than a connection, instead of failing once the database
+runs out of connections.
+"""
+import asyncio
+import inspect
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+from .conditional import ConditionalGetMixin
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def async_views_enabled():
+    return getattr(settings, "ASYNC_VIEWS", False)
+
+
+_slots = weakref.WeakKeyDictionary()
+
+
+def _request_slots():
+    """This event loop's semaphore of ASYNC_VIEWS_CONCURRENCY slots."""
+    loop = asyncio.get_running_loop()
+    size = getattr(settings, "ASYNC_VIEWS_CONCURRENCY", 20)
+    slots = _slots.get(loop)
+    if slots is None or slots[0] != size:
+        slots = _slots[loop] = (size, asyncio.Semaphore(size))
+    return slots[1]
+
+
+def read_view(sync_view, async_view):
+    """
+    ``sync_view``, or with ASYNC_VIEWS on a view that serves GET and HEAD
+    with ``async_view`` and hands every other method to ``sync_view``.
+    """
+    if not async_views_enabled():
+        return sync_view
+
+    async def view(request, *args, **kwargs):
+        async with _request_slots():
+            if request.method in READ_METHODS:
+                return await async_view(request, *args, **kwargs)
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    return csrf_exempt(view)
+
+
+class AsyncAPIViewMixin:
+    """APIView.dispatch() awaiting coroutine handlers."""
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncGenericMixin(AsyncAPIViewMixin):
+
+    async def aget_queryset(self):
+        return self.get_queryset()
+
+    async def _aconditional(self, queryset, respond, detail=False):
+        if isinstance(self, ConditionalGetMixin):
+            return await self.aconditional(queryset, respond, detail=detail)
+        return await respond()
+
+
+class AsyncListMixin(AsyncGenericMixin):
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def apaginate_queryset(self, queryset):
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        if hasattr(paginator, "apaginate_queryset"):
+            return await paginator.apaginate_queryset(queryset, self.request, view=self)
+        # Page-number pagination counts and slices with the sync ORM
+        return await sync_to_async(paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        page = await self.apaginate_queryset(queryset)
+        rows = page if page is not None else [row async for row in queryset]
+        if isinstance(self, ConditionalGetMixin):
+            return self.list_response(page, rows)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(rows, many=True).data)
+
+
+class AsyncRetrieveMixin(AsyncGenericMixin):
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    def _lookup(self, queryset):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        try:
+            obj = await self._lookup(queryset).aget()
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            # Same message as the get_object_or_404() sync views use
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def aretrieve(self, request, *args, **kwargs):
+        async def respond():
+            return Response(self.get_serializer(await self.aget_object()).data)
+
+        queryset = self.filter_queryset(await self.aget_queryset())
+        try:
+            queryset = self._lookup(queryset)
+        except (TypeError, ValueError, ValidationError):
+            # aget_object() turns the same error into a 404
+            return await respond()
+        return await self._aconditional(queryset, respond, detail=True)
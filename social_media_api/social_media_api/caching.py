@@ -0,0 +1,26 @@
+"""
+Whether the default cache is shared by every worker process.
+
+Caches that are invalidated by bumping or deleting a key (token
+authentication, the follow graph) are only correct when every worker reads
+the same cache: with local memory each gunicorn worker keeps its own copy
+and never sees another worker's invalidation. Those caches are bypassed
+unless this returns True.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PER_PROCESS_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared():
+    """
+    CACHE_SHARED when set, otherwise whether the default backend is
+    anything but local memory or the dummy cache.
+    """
+    shared = getattr(settings, "CACHE_SHARED", None)
+    if shared is not None:
+        return shared
+    return not isinstance(caches["default"], PER_PROCESS_BACKENDS)
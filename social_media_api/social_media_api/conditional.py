@@ -0,0 +1,160 @@
+"""
+Conditional GET for DRF list and detail views.
+
+ConditionalGetMixin answers ``If-None-Match`` with a 304 without
+serializing. The ETag hashes the validators with the URL (query string
+included, so every filter, search and page has its own), the viewer and
+the negotiated media type.
+
+A list's validators come from the page it has already loaded: each row's
+pk and ``updated_at`` plus get_row_validators() extras, and the page's
+pagination fields (links, count). No query runs beyond the page itself,
+so a list stays as cheap as its paginator makes it, and a 304 skips only
+the serializer. Rows outside the page cannot change the response, except
+through the pagination fields, which are hashed too.
+
+A detail view's validators are one aggregate query over its queryset
+narrowed to the object, by default the row count and the newest
+``updated_at``; views add aggregates in get_validator_aggregates() or
+values in get_validators().
+
+Views whose representation also depends on columns that change without
+touching ``updated_at`` (counters moved with F() updates) or on other
+tables add them to both. Anything left out can be served stale: nested
+author follower counts, for instance, are not tracked.
+
+Last-Modified is only sent for detail views whose validators are the
+default ones.
+
+Async list views share list_response(); async detail views use
+aconditional(), and views that override get_validators() override
+aget_validators() to match.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    updated_field = "updated_at"
+    # Name hashed into the ETag, the view class's by default; views serving
+    # the same responses (sync and async variants) share one
+    etag_namespace = None
+
+    def get_validator_aggregates(self):
+        return {
+            "count": Count("pk"),
+            "updated": Max(self.updated_field),
+        }
+
+    def get_validators(self, queryset):
+        """Values that change whenever the response would."""
+        return queryset.aggregate(**self.get_validator_aggregates())
+
+    def _sends_last_modified(self):
+        return (
+            type(self).get_validator_aggregates is ConditionalGetMixin.get_validator_aggregates
+            and type(self).get_validators is ConditionalGetMixin.get_validators
+            and type(self).aget_validators is ConditionalGetMixin.aget_validators
+        )
+
+    def _etag(self, validators):
+        user = self.request.user
+        parts = [
+            self.etag_namespace or type(self).__name__,
+            self.request.get_full_path(),
+            str(user.pk) if user.is_authenticated else "anon",
+            getattr(self.request, "accepted_media_type", "") or "",
+        ] + [f"{key}={value!r}" for key, value in sorted(validators.items())]
+        digest = hashlib.md5("|".join(parts).encode(), usedforsecurity=False).hexdigest()
+        return quote_etag(digest)
+
+    def _match(self, validators, detail):
+        """(matched, etag, last_modified) for the request's conditional headers."""
+        etag = self._etag(validators)
+        last_modified = validators.get("updated") if detail and self._sends_last_modified() else None
+
+        if_none_match = self.request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            matched = etag in parse_etags(if_none_match) or if_none_match.strip() == "*"
+        elif last_modified is not None:
+            since = parse_http_date_safe(self.request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+            matched = since is not None and int(last_modified.timestamp()) <= since
+        else:
+            matched = False
+        return matched, etag, last_modified
+
+    def _tag(self, response, etag, last_modified):
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
+
+    def _conditional(self, queryset, respond, detail=False):
+        validators = self.get_validators(queryset)
+        if detail and not validators["count"]:
+            # Let the view raise its usual 404
+            return respond()
+        matched, etag, last_modified = self._match(validators, detail)
+        response = Response(status=status.HTTP_304_NOT_MODIFIED) if matched else respond()
+        return self._tag(response, etag, last_modified)
+
+    def get_row_validators(self, obj):
+        """Values of one listed row that change whenever its representation would."""
+        return (obj.pk, getattr(obj, self.updated_field))
+
+    def list_response(self, page, rows):
+        """Response for a list whose ``rows`` (the ``page``, if paginated) are loaded."""
+        validators = {"rows": [self.get_row_validators(obj) for obj in rows]}
+        if page is not None:
+            # Counts and links; evaluated once, the paginator caches them
+            meta = self.get_paginated_response([]).data
+            validators["page"] = [(key, value) for key, value in meta.items() if key != "results"]
+        matched, etag, _ = self._match(validators, detail=False)
+        if matched:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = self.get_serializer(rows, many=True).data
+            response = self.get_paginated_response(data) if page is not None else Response(data)
+        return self._tag(response, etag, None)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        return self.list_response(page, page if page is not None else list(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        def respond():
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Not a valid value for the lookup field: the view's 404
+            return respond()
+        return self._conditional(queryset, respond, detail=True)
+
+    # Async views (social_media_api/asyncviews.py)
+
+    async def aget_validators(self, queryset):
+        """get_validators() with the async ORM."""
+        return await queryset.aaggregate(**self.get_validator_aggregates())
+
+    async def aconditional(self, queryset, respond, detail=False):
+        """_conditional() for an async ``respond`` coroutine function."""
+        validators = await self.aget_validators(queryset)
+        if detail and not validators["count"]:
+            return await respond()
+        matched, etag, last_modified = self._match(validators, detail)
+        response = Response(status=status.HTTP_304_NOT_MODIFIED) if matched else await respond()
+        return self._tag(response, etag, last_modified)
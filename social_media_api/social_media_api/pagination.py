@@ -0,0 +1,266 @@
+"""
+Shared pagination classes.
+
+KeysetPagination seeks on an ordered tuple of columns, e.g. (created_at, id),
+so page 10,000 costs the same as page 1 and no COUNT(*) is issued. Views pick
+it or the page-number StandardResultsSetPagination through pagination_class.
+"""
+import base64
+import json
+from collections import OrderedDict
+from functools import cached_property
+
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite key.
+
+    The default key is ("-created_at", "-id"); a view can set
+    ``keyset_ordering`` to use other columns or annotations. All columns must
+    sort in the same direction and the last one must be unique.
+    """
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        return self._page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() with the async ORM."""
+        queryset = self._page_queryset(queryset, request, view)
+        return self._page([row async for row in queryset])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, "keyset_ordering", self.ordering))
+        self.fields = [name.lstrip("-") for name in self.ordering]
+        self.descending = self.ordering[0].startswith("-")
+
+        self.position, self.reverse = self.decode_cursor(request, queryset)
+
+        ordering = self.ordering if not self.reverse else self._flip(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._seek(self.position, forward=not self.reverse))
+        # One extra row tells us whether there is another page
+        return queryset[:self.page_size + 1]
+
+    def _page(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first_position = self._position(rows[0]) if rows else position
+        self.last_position = self._position(rows[-1]) if rows else position
+        return rows
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self._link(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.first_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            values = payload["p"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                self._field(queryset, name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get("r"))
+
+    @staticmethod
+    def _field(queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def _link(self, position, reverse):
+        token = self.encode_cursor(position, reverse)
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, token
+        )
+
+    def _position(self, obj):
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return values
+
+    def _seek(self, position, forward):
+        # (a, b) after (x, y)  ==  a > x OR (a = x AND b > y), flipped for DESC
+        lookup = "lt" if self.descending == forward else "gt"
+        condition = Q()
+        for i in reversed(range(len(self.fields))):
+            step = Q(**{f"{self.fields[i]}__{lookup}": position[i]})
+            if i < len(self.fields) - 1:
+                step |= Q(**{self.fields[i]: position[i]}) & condition
+            condition = step
+        # Redundant bound on the leading column so the planner can range-scan
+        # the index instead of evaluating the OR across the whole table
+        bound = Q(**{f"{self.fields[0]}__{lookup}e": position[0]})
+        return bound & condition
+
+    @staticmethod
+    def _flip(ordering):
+        return tuple(name[1:] if name.startswith("-") else f"-{name}" for name in ordering)
+
+
+class LazyCountPage(Page):
+    def has_next(self):
+        return self.has_more
+
+
+class LazyCountPaginator(Paginator):
+    """
+    Paginator that never issues an unbounded COUNT(*).
+
+    ``count`` is capped at ``count_limit`` rows, and whether a next page exists
+    is decided by fetching one extra row.
+    """
+    count_limit = 1000
+
+    @cached_property
+    def count(self):
+        if self.count_limit is None:
+            return 0
+        return self.object_list[:self.count_limit + 1].count()
+
+    @property
+    def count_is_exact(self):
+        # Without a limit nothing is counted at all
+        return self.count_limit is not None and self.count <= self.count_limit
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        page = LazyCountPage(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+
+class UncountedPaginator(LazyCountPaginator):
+    count_limit = None
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Page-number pagination with a selectable count strategy.
+
+    count_mode (or a view's ``pagination_count_mode``) is one of:
+      "exact"        full COUNT(*) on every page
+      "approximate"  COUNT capped at LazyCountPaginator.count_limit rows
+      "none"         no count at all
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    count_mode = "approximate"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = getattr(view, "pagination_count_mode", self.count_mode)
+        self.django_paginator_class = {
+            "exact": Paginator,
+            "approximate": LazyCountPaginator,
+            "none": UncountedPaginator,
+        }[self.count_mode]
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        paginator = self.page.paginator
+        fields = []
+        if self.count_mode == "exact":
+            fields.append(("count", paginator.count))
+        elif self.count_mode == "approximate":
+            fields.append(("count", paginator.count))
+            fields.append(("count_is_exact", paginator.count_is_exact))
+        fields += [
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]
+        return Response(OrderedDict(fields))
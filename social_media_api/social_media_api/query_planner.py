@@ -0,0 +1,98 @@
+"""
+Build select_related/prefetch_related calls from a serializer's fields.
+
+Nested serializers on forward foreign keys become select_related joins,
+nested ``many=True`` serializers become Prefetch objects whose querysets are
+planned the same way, and dotted sources such as ``actor.username`` join the
+relation they walk through. A list endpoint then runs a fixed number of
+queries no matter how many rows it returns.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def _forward_relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if field.is_relation and (field.many_to_one or field.one_to_one) and field.concrete:
+        return field
+    return None
+
+
+def _walk(serializer, model, prefix, select, prefetch, overrides):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        attrs = field.source.split(".")
+
+        if isinstance(field, ListSerializer):
+            lookup = prefix + field.source.replace(".", "__")
+            if lookup in overrides:
+                queryset = overrides[lookup]
+            else:
+                try:
+                    related_model = model._meta.get_field(attrs[0]).related_model
+                except FieldDoesNotExist:
+                    continue
+                queryset = related_model._default_manager.all()
+            prefetch.append(
+                Prefetch(lookup, queryset=plan_queryset(queryset, field.child))
+            )
+            continue
+
+        # Follow forward relations along the source path (author, actor.username, ...)
+        current, path = model, prefix
+        depth = len(attrs) if isinstance(field, BaseSerializer) else len(attrs) - 1
+        for name in attrs[:depth]:
+            relation = _forward_relation(current, name)
+            if relation is None:
+                break
+            path += name
+            select.add(path)
+            current = relation.related_model
+            path += "__"
+        else:
+            if isinstance(field, BaseSerializer) and depth:
+                _walk(field, current, path, select, prefetch, overrides)
+
+
+def plan_queryset(queryset, serializer, overrides=None):
+    """
+    Return ``queryset`` with the joins and prefetches ``serializer`` needs.
+
+    ``serializer`` may be a class or an instance. ``overrides`` maps prefetch
+    lookups (e.g. "comments") to the queryset to use for them, which is how
+    callers bound or filter nested lists.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    select, prefetch = set(), []
+    _walk(serializer, queryset.model, "", select, prefetch, overrides or {})
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class PlannedQuerysetMixin:
+    """
+    View mixin that plans ``get_queryset()`` from the view's serializer.
+
+    Override ``get_prefetch_overrides`` to bound nested lists; views that
+    build their own queryset pass it through ``plan()``.
+    """
+
+    def get_prefetch_overrides(self):
+        return {}
+
+    def plan(self, queryset):
+        return plan_queryset(
+            queryset, self.get_serializer_class(), self.get_prefetch_overrides()
+        )
+
+    def get_queryset(self):
+        return self.plan(super().get_queryset())
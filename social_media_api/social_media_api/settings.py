@@ -61,16 +61,85 @@ INSTALLED_APPS = [
 
 
 REST_FRAMEWORK = {
+    # TokenAuthentication with cached token lookups, see accounts/authentication.py
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
 
-   'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Keyset (cursor) pagination; views can opt into page numbers with
+    # social_media_api.pagination.StandardResultsSetPagination
+    'DEFAULT_PAGINATION_CLASS': 'social_media_api.pagination.KeysetPagination',
     'PAGE_SIZE': 5,
 }
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
+# Home timeline: authors with more followers than this are merged into feeds
+# at read time instead of being fanned out to every follower on write.
+TIMELINE_FANOUT_THRESHOLD = int(os.environ.get("TIMELINE_FANOUT_THRESHOLD", 5000))
+# Number of an author's recent posts copied into a timeline on follow/rebuild
+TIMELINE_BACKFILL_LIMIT = int(os.environ.get("TIMELINE_BACKFILL_LIMIT", 200))
+# Latest comments inlined per post in post lists/feeds (0 = all of them)
+POST_INLINE_COMMENTS_LIMIT = int(os.environ.get("POST_INLINE_COMMENTS_LIMIT", 20))
+# Notifications for the same recipient/verb/target within this many seconds
+# are coalesced into one row by `manage.py drain_notifications`
+NOTIFICATION_COALESCE_WINDOW = int(os.environ.get("NOTIFICATION_COALESCE_WINDOW", 3600))
+# Upper bound on how stale a cached unread badge count can get
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 60
+# Token -> user cache (accounts/authentication.py): per-process LRU size and
+# lifetime, and lifetime in the shared cache. Invalidation is immediate; the
+# cache is only used when CACHES is shared by all workers (see below).
+TOKEN_AUTH_LOCAL_SIZE = int(os.environ.get("TOKEN_AUTH_LOCAL_SIZE", 10000))
+TOKEN_AUTH_LOCAL_TTL = int(os.environ.get("TOKEN_AUTH_LOCAL_TTL", 60))
+TOKEN_AUTH_SHARED_TTL = int(os.environ.get("TOKEN_AUTH_SHARED_TTL", 300))
+# Lifetime of cached following/follower id sets (accounts/graph.py); follow
+# changes invalidate them straight away, on a shared cache only (see below)
+FOLLOW_GRAPH_CACHE_TIMEOUT = int(os.environ.get("FOLLOW_GRAPH_CACHE_TIMEOUT", 3600))
+
+# Password hashing (accounts/hashers.py). New passwords use PASSWORD_HASHER,
+# "scrypt", "argon2" (needs argon2-cffi) or "pbkdf2"; hashes made by the
+# others still verify and are upgraded on the owner's next login, as are
+# hashes made with different costs than the ones below.
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "scrypt")
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get("PASSWORD_SCRYPT_WORK_FACTOR", 2**14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get("PASSWORD_SCRYPT_BLOCK_SIZE", 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get("PASSWORD_SCRYPT_PARALLELISM", 1))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get("PASSWORD_ARGON2_MEMORY_COST", 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 8))
+_PASSWORD_HASHERS = {
+    "scrypt": "accounts.hashers.TunedScryptPasswordHasher",
+    "argon2": "accounts.hashers.TunedArgon2PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ["django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher"]
+# Concurrent password hashes per process (0 = one per CPU) and how long a
+# login/signup waits for a free slot before getting a 503
+PASSWORD_HASHING_CONCURRENCY = int(os.environ.get("PASSWORD_HASHING_CONCURRENCY", 0))
+PASSWORD_HASHING_WAIT = float(os.environ.get("PASSWORD_HASHING_WAIT", 5))
+
+# Serve the feed, post, notification list and profile reads from async views
+# (social_media_api/asyncviews.py); for ASGI deployments, see gunicorn_asgi.py
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "").lower() in ("1", "true", "yes")
+# Requests those views run at once per worker, each holding a database
+# connection; keep workers x this under the database's connection limit
+ASYNC_VIEWS_CONCURRENCY = int(os.environ.get("ASYNC_VIEWS_CONCURRENCY", 20))
+
+# Cache (unread badges, ...). Local memory by default; point CACHE_BACKEND /
+# CACHE_LOCATION at Redis or Memcached so all workers share invalidations.
+# The token and follow-graph caches stay off on a per-process backend
+# (social_media_api/caching.py); CACHE_SHARED=1 forces them on, e.g. for a
+# single-process server, and CACHE_SHARED=0 forces them off.
+CACHE_SHARED = {"1": True, "0": False}.get(os.environ.get("CACHE_SHARED", ""))
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
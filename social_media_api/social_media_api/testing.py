@@ -0,0 +1,38 @@
+"""
+Test helpers shared by the app test suites.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Assertions for TestCase classes that guard against N+1 queries.
+    """
+
+    def count_queries(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context.captured_queries)
+
+    def assertQueryCountFlat(self, url, page_sizes=(1, 10), client=None, **params):
+        """
+        Fail if fetching ``url`` runs more queries for bigger pages.
+
+        The endpoint is requested once per entry in ``page_sizes``; every
+        request must issue the same number of queries.
+        """
+        client = client or self.client
+        counts = {}
+        for size in page_sizes:
+            def fetch():
+                response = client.get(url, {"page_size": size, **params})
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertEqual(len(response.data["results"]), size,
+                                 "seed enough rows to fill the largest page")
+            counts[size] = self.count_queries(fetch)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"query count of {url} grows with page size: {counts}",
+        )
+        return counts[page_sizes[0]]
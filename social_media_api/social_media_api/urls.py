@@ -21,4 +21,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('api/', include('posts.urls')),  # Posts and comments endpoints
+    path('notifications/', include('notifications.urls')),
 ]